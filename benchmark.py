@@ -0,0 +1,747 @@
+import argparse
+import contextlib
+import gzip
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from collections import Counter
+
+# Benchmarks for the dashboard. Run from the repository root, e.g.
+#   python benchmark.py payload
+
+os.chdir(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.getcwd())
+
+CHOROPLETH_DATASETS = ["table_6_1", "table_13", "table_14", "ner", "ger", "table_13_weighted"]
+
+
+def figure_bytes(fig):
+    return len(fig.to_json().encode("utf-8"))
+
+
+def first_indicator(literacy, dataset):
+    options = literacy.update_indicator_dropdown(dataset)[0]
+    return options[0]["value"] if options else None
+
+
+def bench_payload(args):
+    import datasets
+    import geometry
+    import literacy
+    import plotly.utils
+    from config import load_config
+
+    app = literacy.create_app(load_config("local"))
+
+    with open("data/nepal-with-provinces-acesmndr.geojson", "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    raw_bytes = len(json.dumps(raw).encode("utf-8"))
+
+    print(f"geometry (raw):        {raw_bytes:>9,} bytes, {geometry.vertex_count(raw):>6,} vertices")
+    simplified, simplified_bytes, _ = datasets.get("geojson")
+    print(f"geometry (simplified): {len(simplified_bytes):>9,} bytes, {geometry.vertex_count(simplified):>6,} vertices (sent once per session)")
+    print()
+    print(f"{'dataset':<20}{'inline geojson':>16}{'per callback':>16}{'reduction':>12}{'indicator patch':>18}")
+    for dataset in CHOROPLETH_DATASETS:
+        fig = literacy.update_map(dataset, "split", first_indicator(literacy, dataset))
+        after = figure_bytes(fig)
+        before = after + raw_bytes
+        patch = "-"
+        indicators = literacy.indicator_manifest_values(dataset)
+        if dataset in literacy.PATCHABLE_DATASETS and len(indicators) > 1:
+            selection = literacy.default_selection(dataset)
+            _, shown = app.render_map(dict(selection, indicator=indicators[0]), None)
+            update, _ = app.render_map(dict(selection, indicator=indicators[1]), shown)
+            patch = f"{len(json.dumps(update.to_plotly_json(), cls=plotly.utils.PlotlyJSONEncoder)):,}"
+        print(f"{dataset:<20}{before:>16,}{after:>16,}{before / after:>11.0f}x{patch:>18}")
+
+
+def _ingest_child(mode):
+    # Runs in a fresh interpreter so time and peak RSS only cover one loader
+    import pandas as pd
+    import ingest
+
+    start = time.perf_counter()
+    if mode == "csv":
+        # What literacy.py used to keep around: the full export plus the slice
+        raw = pd.read_csv("data/OOS_Rate_Countries.csv")
+        raw.columns = raw.columns.str.strip().str.lower()
+        df = raw[
+            (raw["country"].str.strip().str.upper() == "NPL") |
+            (raw["name"].str.strip().str.lower() == "nepal")
+        ]
+        retained = [raw, df]
+    else:
+        df = ingest.load_oos("data/OOS_Rate_Countries.csv", countries=["NPL"])
+        retained = [df]
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        "seconds": elapsed,
+        "frame_bytes": sum(int(d.memory_usage(deep=True).sum()) for d in retained),
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "rows": len(df),
+    }))
+
+
+def bench_ingest(args):
+    if args.child:
+        _ingest_child(args.child)
+        return
+
+    import ingest
+    # Make sure the Parquet cache exists so "parquet" measures a warm boot
+    ingest.load_oos("data/OOS_Rate_Countries.csv", countries=["NPL"])
+
+    print(f"{'loader':<10}{'seconds':>10}{'frame memory':>16}{'peak RSS':>12}{'rows':>8}")
+    for mode in ["csv", "parquet"]:
+        runs = []
+        for _ in range(args.repeat):
+            out = subprocess.run([sys.executable, __file__, "ingest", "--child", mode],
+                                 capture_output=True, text=True, check=True).stdout
+            runs.append(json.loads(out.strip().splitlines()[-1]))
+        best = min(runs, key=lambda r: r["seconds"])
+        print(f"{mode:<10}{best['seconds']:>10.3f}{best['frame_bytes'] / 1024:>13.0f} KB"
+              f"{best['peak_rss_kb'] / 1024:>9.1f} MB{best['rows']:>8}")
+
+
+def bench_startup(args):
+    if args.cold:
+        import tempfile
+        os.environ["INGEST_CACHE_DIR"] = tempfile.mkdtemp(prefix="literacy-cache-")
+
+    import profiling
+    profiling.enable()
+    profiling.reset()
+
+    with profiling.span("import literacy"):
+        import literacy
+        import datasets
+        from config import load_config
+    literacy.create_app(load_config("local"))
+    with profiling.span("load all datasets"):
+        datasets.load_all()
+
+    report = profiling.report()
+    print(f"{'stage':<34}{'ms':>10}{'RSS MB':>10}{'peak MB':>10}")
+    for s in report["spans"]:
+        rss = f"{s['rss_kb'] / 1024:.1f}" if s["rss_kb"] is not None else "-"
+        peak = f"{s['peak_rss_kb'] / 1024:.1f}" if s["peak_rss_kb"] is not None else "-"
+        print(f"{s['name']:<34}{s['duration_ms']:>10.1f}{rss:>10}{peak:>10}")
+    if args.report:
+        profiling.write_report(args.report)
+    if args.trace:
+        profiling.write_chrome_trace(args.trace)
+
+
+def _load_client(args):
+    # One client process: POST map callbacks in a loop until the deadline
+    import http.client
+
+    port, deadline, bodies = args
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    done = 0
+    while time.time() < deadline:
+        body = bodies[done % len(bodies)]
+        conn.request("POST", "/_dash-update-component", body=body, headers={"Content-Type": "application/json"})
+        response = conn.getresponse()
+        response.read()
+        if response.status != 200:
+            raise RuntimeError(f"callback returned {response.status}")
+        done += 1
+    conn.close()
+    return done
+
+
+def _map_request_body(dataset, view_mode, indicator, country="NPL"):
+    return json.dumps({
+        "output": "..map.figure...map-rendered.data..",
+        "outputs": [{"id": "map", "property": "figure"}, {"id": "map-rendered", "property": "data"}],
+        "inputs": [{"id": "map-selection", "property": "data", "value": {
+            "dataset": dataset, "view_mode": view_mode, "indicator": indicator, "country": country}}],
+        "changedPropIds": ["map-selection.data"],
+        "state": [{"id": "map-rendered", "property": "data", "value": None}],
+    })
+
+
+def _map_request_bodies():
+    return [_map_request_body(dataset, "split", indicator) for dataset, indicator in [
+        ("table_6_1", None), ("table_13", "Can read & write"), ("table_14", "Primary"),
+        ("ner", "Basic Level Total"), ("ger", "Basic Level Total"), ("table_13_weighted", None)]]
+
+
+@contextlib.contextmanager
+def _gunicorn(workers, **env):
+    # The production entry point on a free local port; yields (port, master pid)
+    import socket
+    import urllib.request
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), GUNICORN_THREADS="1", HOST="127.0.0.1", PORT=str(port), **env)
+    proc = subprocess.Popen([sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "wsgi:server"],
+                            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        for _ in range(600):
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=1).read()
+                break
+            except OSError:
+                time.sleep(0.2)
+        else:
+            raise RuntimeError("gunicorn did not come up")
+        yield port, proc.pid
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def bench_load(args):
+    from multiprocessing import Pool
+
+    bodies = _map_request_bodies()
+    print(f"{'workers':>8}{'clients':>9}{'requests':>10}{'req/s':>10}")
+    for workers in args.workers:
+        with _gunicorn(workers) as (port, _):
+            deadline = time.time() + args.seconds
+            with Pool(args.clients) as pool:
+                total = sum(pool.map(_load_client, [(port, deadline, bodies)] * args.clients))
+            print(f"{workers:>8}{args.clients:>9}{total:>10}{total / args.seconds:>10.0f}")
+
+
+def _smaps_rollup_kb(pid):
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup", encoding="ascii") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                fields[parts[0][:-1]] = int(parts[1])
+    return fields
+
+
+def _child_pids(pid):
+    with open(f"/proc/{pid}/task/{pid}/children", encoding="ascii") as f:
+        return [int(child) for child in f.read().split()]
+
+
+def _post_bodies(args):
+    import http.client
+
+    port, bodies = args
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    for body in bodies:
+        conn.request("POST", "/_dash-update-component", body=body, headers={"Content-Type": "application/json"})
+        response = conn.getresponse()
+        response.read()
+        if response.status != 200:
+            raise RuntimeError(f"callback returned {response.status}")
+    conn.close()
+
+
+def bench_pss(args):
+    # Total PSS of the gunicorn master and workers after every reachable
+    # output was requested (so each worker touched the data it serves)
+    from multiprocessing import Pool
+    import literacy
+
+    map_inputs, sidebar_inputs = literacy.reachable_inputs()
+    bodies = [_map_request_body(*inputs) for inputs in map_inputs]
+    bodies += [_sidebar_request_body(dataset, indicator, click) for dataset, indicator, click in sidebar_inputs]
+    modes = [("copy-on-write", {"SHARED_DATA": "0"}), ("shared snapshot", {"SHARED_DATA": "1"})]
+    print(f"{'data':<18}{'workers':>8}{'total PSS MB':>14}{'per worker MB':>15}{'private per worker MB':>23}")
+    for mode, env in modes:
+        for workers in args.workers:
+            with _gunicorn(workers, **env) as (port, master):
+                clients = max(workers, 2)
+                with Pool(clients) as pool:
+                    pool.map(_post_bodies, [(port, bodies[i::clients]) for i in range(clients)] * args.rounds)
+                children = _child_pids(master)
+                rollups = [_smaps_rollup_kb(pid) for pid in [master] + children]
+                total = sum(r["Pss"] for r in rollups) / 1024
+                private = sum(r["Private_Clean"] + r["Private_Dirty"] for r in rollups[1:]) / 1024 / len(children)
+                worker_pss = sum(r["Pss"] for r in rollups[1:]) / 1024 / len(children)
+                print(f"{mode:<18}{workers:>8}{total:>14.1f}{worker_pss:>15.1f}{private:>23.1f}")
+
+
+def _rowwise_ger_columns(df):
+    # The per-row .apply() cleaning literacy.py used before ingest.parse_indicator_ids
+    def map_level(indicator):
+        if isinstance(indicator, str):
+            if indicator.startswith("GER.1"):
+                return "Primary"
+            elif indicator.startswith("GER.2"):
+                return "Lower Secondary"
+            elif indicator.startswith("GER.3"):
+                return "Upper Secondary"
+        return None
+
+    df["Level"] = df["indicatorId"].apply(map_level)
+    df["indicator"] = df["Level"].map({"Primary": "GER.1", "Lower Secondary": "GER.2", "Upper Secondary": "GER.3"})
+    df["Gender"] = df["indicatorId"].apply(lambda x: "Male" if ".M" in x else "Female" if ".F" in x else "Total")
+
+
+def bench_indicators(args):
+    import numpy as np
+    import pandas as pd
+    import datasets
+
+    # Synthetic multi-country UIS export: GER/NER/OFST codes for every level and sex
+    codes = [f"{family}.{level}{sex}{suffix}"
+             for family, suffix in [("GER", ""), ("NERT", ".CP"), ("OFST", ".CP")]
+             for level in "123" for sex in ["", ".F", ".M"]]
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "indicatorId": np.array(codes, dtype=object)[rng.integers(0, len(codes), args.rows)],
+        "geoUnit": "NPL",
+        "year": rng.integers(1970, 2024, args.rows),
+        "value": rng.random(args.rows) * 100,
+    })
+
+    rowwise = df.copy()
+    start = time.perf_counter()
+    _rowwise_ger_columns(rowwise)
+    rowwise_seconds = time.perf_counter() - start
+
+    vectorized = df.copy()
+    start = time.perf_counter()
+    datasets._add_indicator_columns(vectorized, family="GER", indicator_prefix="GER")
+    vectorized_seconds = time.perf_counter() - start
+
+    for col in ["Level", "indicator", "Gender"]:
+        assert vectorized[col].astype(object).equals(rowwise[col].astype(object)), col
+    memory = {name: frame[["Level", "indicator", "Gender"]].memory_usage(deep=True).sum() / 2**20
+              for name, frame in [("rowwise", rowwise), ("vectorized", vectorized)]}
+
+    print(f"{args.rows:,} rows, {len(codes)} distinct indicator codes")
+    print(f"{'parser':<12}{'seconds':>10}{'derived cols MB':>18}")
+    print(f"{'row-wise':<12}{rowwise_seconds:>10.3f}{memory['rowwise']:>18.1f}")
+    print(f"{'vectorized':<12}{vectorized_seconds:>10.3f}{memory['vectorized']:>18.1f}")
+
+
+def bench_compression(args):
+    import literacy
+    from config import load_config
+
+    bodies = _map_request_bodies()
+    headers = {"Accept-Encoding": "gzip, br"}
+    # Load the data and warm plotly up once, so "first" only measures the figure build
+    warm_client = literacy.create_app(load_config("local", compress=False)).server.test_client()
+    for body in bodies:
+        warm_client.post("/_dash-update-component", data=body, content_type="application/json")
+    print(f"{'compression':<14}{'request':<22}{'bytes':>10}{'CPU ms/req':>12}")
+    for compress in [False, True]:
+        app = literacy.create_app(load_config("local", compress=compress))
+        client = app.server.test_client()
+        label = "on" if compress else "off"
+
+        def post(body):
+            return client.post("/_dash-update-component", data=body, content_type="application/json", headers=headers)
+
+        # First request per body builds the figure (and compresses it once)
+        start = time.process_time()
+        first_bytes = sum(len(post(body).data) for body in bodies)
+        first_ms = (time.process_time() - start) * 1000 / len(bodies)
+        start = time.process_time()
+        for _ in range(args.repeat):
+            repeat_bytes = sum(len(post(body).data) for body in bodies)
+        repeat_ms = (time.process_time() - start) * 1000 / (args.repeat * len(bodies))
+        print(f"{label:<14}{'map, first':<22}{first_bytes // len(bodies):>10,}{first_ms:>12.2f}")
+        print(f"{label:<14}{'map, repeat':<22}{repeat_bytes // len(bodies):>10,}{repeat_ms:>12.3f}")
+
+        for name, url in [("province geometry", literacy.province_geojson_url()), ("page", "/"), ("layout", "/_dash-layout")]:
+            start = time.process_time()
+            for _ in range(args.repeat):
+                response = client.get(url, headers=headers)
+                size = len(response.data)
+                response.close()
+            print(f"{label:<14}{name:<22}{size:>10,}{(time.process_time() - start) * 1000 / args.repeat:>12.3f}")
+
+
+def _legacy_click(dataset, province):
+    # The per-click path update_sidebar_chart ran before the prebuilt
+    # province sidebars: mask the frame, coerce the row, build the figure
+    import datasets
+    import pandas as pd
+    import plotly.express as px
+    import plotly.graph_objs as go
+    from dash import html
+
+    if dataset == "table_13_weighted":
+        df_13_weighted = datasets.get("table_13_weighted")
+        row = df_13_weighted[df_13_weighted["Province"] == province]
+        value = row.iloc[0]["Normalized Illiteracy Rate (%)"]
+        return go.Figure(layout={"xaxis": {"visible": False}, "yaxis": {"visible": False}}), html.Div([
+            html.H4(f"{province}"), html.P(f"Normalized Illiteracy Rate: {value:.2f}%")
+        ])
+    df_clean = datasets.get("table_6_1")
+    row = df_clean[df_clean["Province"] == province].copy()
+    row[["Male", "Female", "Total"]] = row[["Male", "Female", "Total"]].apply(pd.to_numeric, errors="coerce")
+    values = row.iloc[0]
+    fig = px.bar(row, x="Province", y=["Male", "Female", "Total"], barmode="group",
+                          title=f"Literacy Rates for {province}", labels={"value": "Literacy Rate (%)", "variable": "Gender"})
+    fig.update_layout(height=350)
+    return fig, html.Div([html.H4(f"{province}"), html.P(f"Male Literacy Rate: {values['Male']}%")])
+
+
+def _sidebar_request_body(dataset, indicator=None, clickData=None):
+    return json.dumps({
+        "output": "..sidebar-chart.figure...province-data.children..",
+        "outputs": [{"id": "sidebar-chart", "property": "figure"}, {"id": "province-data", "property": "children"}],
+        "inputs": [
+            {"id": "selection", "property": "data", "value": {"dataset": dataset, "indicator": indicator}},
+            {"id": "map", "property": "clickData", "value": clickData},
+        ],
+        "changedPropIds": ["map.clickData"],
+        "state": [],
+    })
+
+
+def _province_click_body(dataset, province):
+    return _sidebar_request_body(dataset, None, {"points": [{"location": province}]})
+
+
+def bench_click(args):
+    import statistics
+    import datasets
+    import literacy
+    from config import load_config
+
+    app = literacy.create_app(load_config("local"))
+    client = app.server.test_client()
+    provinces = datasets.provinces()
+
+    def per_click_us(click):
+        samples = []
+        for _ in range(args.repeat):
+            for province in provinces:
+                start = time.perf_counter()
+                click(province)
+                samples.append((time.perf_counter() - start) * 1e6)
+        return statistics.median(samples), max(samples)
+
+    print(f"{'view':<20}{'path':<34}{'median us':>11}{'max us':>11}")
+    for dataset in ["table_6_1", "table_13_weighted"]:
+        # First clicks build the prebuilt sidebars and fill the caches
+        for province in provinces:
+            client.post("/_dash-update-component", data=_province_click_body(dataset, province), content_type="application/json")
+        paths = [
+            ("before: mask + build per click", lambda p: _legacy_click(dataset, p)),
+            ("after: callback (province lookup)", lambda p: literacy.update_sidebar_chart(dataset, None, {"points": [{"location": p}]})),
+            ("after: cached callback", lambda p: app.update_sidebar_chart(dataset, None, {"points": [{"location": p}]})),
+            ("after: HTTP request, end to end", lambda p: client.post(
+                "/_dash-update-component", data=_province_click_body(dataset, p),
+                content_type="application/json", headers={"Accept-Encoding": "gzip"})),
+        ]
+        for name, click in paths:
+            median, worst = per_click_us(click)
+            print(f"{dataset:<20}{name:<34}{median:>11,.0f}{worst:>11,.0f}")
+
+
+def _legacy_reshape(dataset, view_mode):
+    # The melt/transpose/filter pipeline update_map ran on every call before
+    # datasets.table_6_2_long / table_6_3_long
+    import datasets
+
+    if dataset == "table_6_2":
+        df_6_2_long = datasets.get("table_6_2").melt(id_vars="Age group", value_vars=["Total in urban", "Total in Rural"],
+                                                     var_name="Area", value_name="Literacy Rate (%)")
+        df_6_2_long["Area"] = df_6_2_long["Area"].replace({"Total in urban": "Urban", "Total in Rural": "Rural"})
+        return df_6_2_long
+    df_6_3_fixed = datasets.get("table_6_3").copy()
+    df_6_3_fixed.set_index("Gender/Poverty Status", inplace=True)
+    df_6_3_fixed = df_6_3_fixed.drop(columns=["Total"], errors="ignore").T
+    df_6_3_fixed.reset_index(inplace=True)
+    df_6_3_fixed = df_6_3_fixed.rename(columns={"index": "Age group"})
+    df_6_3_long = df_6_3_fixed.melt(id_vars="Age group", var_name="Status", value_name="Literacy Rate (%)")
+    if view_mode == "split":
+        status = df_6_3_long["Status"]
+        return (df_6_3_long[status.str.lower().str.contains("poor") & ~status.str.lower().str.contains("non")],
+                df_6_3_long[status.str.lower().str.contains("non")])
+    return df_6_3_long
+
+
+def _new_reshape(dataset, view_mode):
+    import datasets
+
+    if dataset == "table_6_2":
+        return datasets.get("table_6_2_long")
+    df_6_3_long = datasets.get("table_6_3_long")
+    if view_mode == "split":
+        return df_6_3_long[df_6_3_long["poor"]], df_6_3_long[df_6_3_long["non_poor"]]
+    return df_6_3_long
+
+
+def _cpu_ms(func, repeat, rounds=5):
+    # Best of several rounds, so one noisy round doesn't decide the comparison
+    best = None
+    for _ in range(rounds):
+        start = time.process_time()
+        for _ in range(repeat):
+            func()
+        elapsed = (time.process_time() - start) / repeat * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench_reshape(args):
+    import literacy
+    from config import load_config
+
+    # The raw callback, so every call rebuilds the figure instead of hitting the cache
+    literacy.create_app(load_config("local"))
+    print(f"{'view':<22}{'reshape before':>16}{'reshape after':>15}{'callback before':>17}{'callback after':>16}  (CPU ms/call)")
+    for dataset, view_mode in [("table_6_2", "split"), ("table_6_3", "split"), ("table_6_3", "combined")]:
+        _new_reshape(dataset, view_mode)
+        reshape_before = _cpu_ms(lambda: _legacy_reshape(dataset, view_mode), args.repeat)
+        reshape_after = _cpu_ms(lambda: _new_reshape(dataset, view_mode), args.repeat)
+        callback_after = _cpu_ms(lambda: literacy.update_map(dataset, view_mode, None), args.repeat)
+        # The figure code is unchanged, so the old callback is the old
+        # reshape followed by today's figure build
+        callback_before = _cpu_ms(lambda: (_legacy_reshape(dataset, view_mode),
+                                           literacy.update_map(dataset, view_mode, None)), args.repeat)
+        print(f"{dataset + ' ' + view_mode:<22}{reshape_before:>16.2f}{reshape_after:>15.2f}{callback_before:>17.2f}{callback_after:>16.2f}")
+
+
+def _callback_props(key):
+    # callback_map key -> its "id.property" outputs
+    return key.strip(".").split("...") if key.startswith("..") else [key]
+
+
+def _fired_callbacks(app, changed):
+    # Callbacks a user change to the `changed` props sets off, run in waves
+    # like the Dash renderer does: a callback runs once per wave in which
+    # any of its inputs changed, unless only its own outputs did
+    fired = Counter()
+    written = {prop: None for prop in changed}
+    for _ in range(10):
+        if not written:
+            break
+        wave = {}
+        for key, entry in app.callback_map.items():
+            inputs = {f"{i['id']}.{i['property']}" for i in entry["inputs"]}
+            if any(written[prop] != key for prop in inputs & written.keys()):
+                fired[key] += 1
+                wave.update((prop, key) for prop in _callback_props(key))
+        written = wave
+    return fired
+
+
+def _dispatch(client, app, key, values, headers=None):
+    entry = app.callback_map[key]
+
+    def props(items):
+        return [dict(i, value=values.get(f"{i['id']}.{i['property']}")) for i in items]
+    body = {
+        "output": key,
+        "outputs": [dict(zip(("id", "property"), prop.split("."))) for prop in _callback_props(key)],
+        "inputs": props(entry["inputs"]),
+        "state": props(entry["state"]),
+    }
+    return client.post("/_dash-update-component", data=json.dumps(body), content_type="application/json", headers=headers)
+
+
+def bench_renders(args):
+    import literacy
+    from config import load_config
+
+    app = literacy.create_app(load_config("local", compress=False))
+    client = app.server.test_client()
+    caches = [app.map_cache, app.sidebar_cache]
+    map_key, sidebar_key = (key for key, entry in app.callback_map.items() if entry.get("callback") is not None)
+
+    print(f"{'interaction':<28}{'map renders':>13}{'sidebar renders':>17}")
+    for prop in ["dataset-selector.value", "indicator-selector.value", "view-selector.value",
+                 "country-selector.value", "map.clickData"]:
+        fired = _fired_callbacks(app, [prop])
+        print(f"{prop:<28}{fired[map_key]:>13}{fired[sidebar_key]:>17}")
+
+    # Each dataset switch, dispatched to the server callbacks with what the
+    # clientside callbacks write, on cold caches
+    fired = _fired_callbacks(app, ["dataset-selector.value"])
+    print()
+    print(f"{'switch to':<22}{'requests':>10}{'figure builds':>15}")
+    failed = []
+    for dataset in [o["value"] for o in literacy.DATASET_OPTIONS]:
+        literacy.invalidate_figure_caches(app)
+        selection = literacy.default_selection(dataset)
+        values = {
+            "selection.data": {"dataset": dataset, "indicator": selection["indicator"]},
+            "map-selection.data": selection,
+        }
+        builds = sum(c.builds for c in caches)
+        requests = 0
+        for key in (map_key, sidebar_key):
+            for _ in range(fired[key]):
+                assert _dispatch(client, app, key, values).status_code == 200
+                requests += 1
+        builds = sum(c.builds for c in caches) - builds
+        print(f"{dataset:<22}{requests:>10}{builds:>15}")
+        if fired[map_key] != 1 or fired[sidebar_key] != 1 or builds > 2:
+            failed.append(dataset)
+    if failed:
+        sys.exit(f"more than one map and one sidebar render per dataset switch: {', '.join(failed)}")
+
+
+def _decoded(response):
+    if response.headers.get("Content-Encoding") == "gzip":
+        return gzip.decompress(response.data)
+    return response.data
+
+
+def _layout_props(node, values=None):
+    # "id.property" -> value of every prop in a serialized layout
+    values = {} if values is None else values
+    if isinstance(node, list):
+        for child in node:
+            _layout_props(child, values)
+    elif isinstance(node, dict) and "props" in node:
+        props = node["props"]
+        for name, value in props.items():
+            if "id" in props:
+                values[f"{props['id']}.{name}"] = value
+            _layout_props(value, values)
+    return values
+
+
+def bench_firstload(args):
+    import literacy
+    from config import load_config
+
+    app = literacy.create_app(load_config("local"))
+    client = app.server.test_client()
+    pages = ["/", "/?dataset=table_13&indicator=Can+read+%26+write&province=Koshi",
+             "/?dataset=table_6_1&province=Bagmati", "/?dataset=oos&country=IND"]
+
+    def page_load(url):
+        # What the renderer requests before the map is on screen: the page,
+        # then layout and dependencies, then every initial server callback
+        start = time.perf_counter()
+        nbytes = len(client.get(url, headers={"Accept-Encoding": "gzip"}).data)
+        headers = {"Referer": "http://localhost" + url, "Accept-Encoding": "gzip"}
+        layout, dependencies = (client.get(path, headers=headers) for path in ("/_dash-layout", "/_dash-dependencies"))
+        nbytes += len(layout.data) + len(dependencies.data)
+        values = _layout_props(json.loads(_decoded(layout)))
+        initial = [d for d in json.loads(_decoded(dependencies))
+                   if not d.get("prevent_initial_call") and not d.get("clientside_function")]
+        for callback in initial:
+            nbytes += len(_dispatch(client, app, callback["output"], values, headers).data)
+        return (time.perf_counter() - start) * 1000, nbytes, len(initial)
+
+    print(f"{'page':<66}{'callback requests':>18}{'bytes':>9}{'cold ms':>9}{'warm ms':>9}")
+    for url in pages:
+        literacy.invalidate_figure_caches(app)
+        cold, nbytes, initial = page_load(url)
+        warm = min(page_load(url)[0] for _ in range(args.repeat))
+        print(f"{url:<66}{initial:>18}{nbytes:>9,}{cold:>9.1f}{warm:>9.1f}")
+
+
+def bench_json(args):
+    import plotly.io.json
+    import literacy
+    import serialization
+    from config import load_config
+    from figure_cache import serialize
+
+    literacy.create_app(load_config("local"))
+    branches = [("table_6_1", "split", None), ("table_6_2", "split", None), ("table_6_3", "split", None),
+                ("table_6_3", "combined", None), ("table_13", "split", "Can read & write"),
+                ("table_13_weighted", "split", None), ("table_14", "split", "Primary"),
+                ("ner", "split", "Basic Level Total"), ("ger", "split", "Basic Level Total"),
+                ("oos", "split", "OOS.1", "IND"), ("ger_time", "split", "GER.1", "NPL")]
+    # plotly's encoder with each of its engines, then serialization's own path
+    paths = [("plotly json", "plotly", "json"), ("plotly orjson", "plotly", "orjson"), ("fast", "orjson", "auto")]
+    if serialization.orjson is None:
+        paths = paths[:1]
+    print(f"{'branch':<26}{'path':<15}{'bytes':>9}{'serialize ms':>14}{'encode ms':>11}")
+    for branch in branches:
+        fig = literacy.update_map(*branch)
+        for name, engine, plotly_engine in paths:
+            serialization.configure(engine)
+            plotly.io.json.config.default_engine = plotly_engine
+            value = serialize(fig)
+            # Dash's response body for the map callback
+            response = {"multi": True, "response": {"map": {"figure": value}}}
+            encoded = plotly.io.json.to_json_plotly(response)
+            serialize_ms = _cpu_ms(lambda: serialize(fig), args.repeat)
+            encode_ms = _cpu_ms(lambda: plotly.io.json.to_json_plotly(response), args.repeat)
+            print(f"{' '.join(b for b in branch[:2] if b):<26}{name:<15}{len(encoded):>9,}{serialize_ms:>14.2f}{encode_ms:>11.3f}")
+    plotly.io.json.config.default_engine = "auto"
+    serialization.configure()
+
+
+def bench_memory(args):
+    import datasets
+    import ingest
+    import literacy
+    from config import load_config
+
+    literacy.create_app(load_config("local"))
+    datasets.load_all()
+    report = datasets.memory_report()
+    # The same loaders without the typed stage (derived entries still read
+    # the typed frames they are built from)
+    compact = ingest.compact
+    ingest.compact = lambda df: df.copy()
+    try:
+        untyped = {name: datasets.deep_size(datasets._loaders[name]()) for name in report}
+    finally:
+        ingest.compact = compact
+
+    print(f"{'dataset':<28}{'untyped bytes':>15}{'typed bytes':>13}")
+    for name, nbytes in report.items():
+        print(f"{name:<28}{untyped[name]:>15,}{nbytes:>13,}")
+    print(f"{'total':<28}{sum(untyped.values()):>15,}{sum(report.values()):>13,}")
+    print(f"peak RSS of this process: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Nepal literacy dashboard benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("payload", help="map callback payload size per choropleth dataset").set_defaults(func=bench_payload)
+    ingest_parser = sub.add_parser("ingest", help="OOS CSV vs Parquet cache load time and memory")
+    ingest_parser.add_argument("--repeat", type=int, default=3)
+    ingest_parser.add_argument("--child", choices=["csv", "parquet"], help=argparse.SUPPRESS)
+    ingest_parser.set_defaults(func=bench_ingest)
+    startup_parser = sub.add_parser("startup", help="timed spans and RSS for every import/load stage")
+    startup_parser.add_argument("--cold", action="store_true", help="ignore existing ingest caches")
+    startup_parser.add_argument("--report", help="write the JSON span report here")
+    startup_parser.add_argument("--trace", help="write a Chrome trace-event file here")
+    startup_parser.set_defaults(func=bench_startup)
+    load_parser = sub.add_parser("load", help="requests/sec of the gunicorn entry point by worker count")
+    load_parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    load_parser.add_argument("--clients", type=int, default=8)
+    load_parser.add_argument("--seconds", type=float, default=10.0)
+    load_parser.set_defaults(func=bench_load)
+    indicators_parser = sub.add_parser("indicators", help="row-wise vs vectorized indicatorId parsing")
+    indicators_parser.add_argument("--rows", type=int, default=1_000_000)
+    indicators_parser.set_defaults(func=bench_indicators)
+    reshape_parser = sub.add_parser("reshape", help="per-callback CPU of the table 6.2/6.3 reshapes, before and after")
+    reshape_parser.add_argument("--repeat", type=int, default=20)
+    reshape_parser.set_defaults(func=bench_reshape)
+    compression_parser = sub.add_parser("compression", help="bytes on the wire and CPU per request, compression on vs off")
+    compression_parser.add_argument("--repeat", type=int, default=50)
+    compression_parser.set_defaults(func=bench_compression)
+    click_parser = sub.add_parser("click", help="sidebar latency of clicking through the provinces")
+    click_parser.add_argument("--repeat", type=int, default=20)
+    click_parser.set_defaults(func=bench_click)
+    firstload_parser = sub.add_parser("firstload", help="requests, bytes and time until the map is on the page")
+    firstload_parser.add_argument("--repeat", type=int, default=20)
+    firstload_parser.set_defaults(func=bench_firstload)
+    json_parser = sub.add_parser("json", help="figure serialize and response encode time and bytes per update_map branch")
+    json_parser.add_argument("--repeat", type=int, default=20)
+    json_parser.set_defaults(func=bench_json)
+    pss_parser = sub.add_parser("pss", help="total PSS of gunicorn workers, copy-on-write vs shared data snapshot")
+    pss_parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    pss_parser.add_argument("--rounds", type=int, default=2)
+    pss_parser.set_defaults(func=bench_pss)
+    sub.add_parser("memory", help="deep memory per loaded dataset, with and without the typed loading stage").set_defaults(func=bench_memory)
+    sub.add_parser("renders", help="server renders and figure builds per user interaction (exits 1 on a double render)").set_defaults(func=bench_renders)
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
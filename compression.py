@@ -0,0 +1,138 @@
+import gzip
+import hashlib
+import json
+
+import flask
+
+from figure_cache import FigureCache
+from metrics import callback_dataset
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# HTTP response compression. Dash callback responses only depend on the
+# request's inputs and state, so their compressed bodies are kept in a
+# FigureCache ("response") keyed by those: each figure is compressed once
+# and repeats are answered before Dash dispatches the callback at all.
+# The page layout is cached the same way when the app gives it a key.
+# Static files (Dash component bundles, /assets, the province geometry)
+# are compressed once per path and ETag; other GET responses (the page,
+# layout, /metrics) are compressed per request at a cheaper level. Brotli
+# is used when the brotli module is installed, gzip otherwise.
+
+COMPRESSIBLE_TYPES = ("application/json", "application/javascript", "application/geo+json", "image/svg+xml", "text/")
+MIN_SIZE = 500
+# (gzip level, brotli quality) for bodies compressed once and kept, and
+# for bodies compressed on every request
+CACHED_LEVELS = (9, 11)
+PER_REQUEST_LEVELS = (6, 5)
+
+
+def encode(data, levels=CACHED_LEVELS):
+    # Every encoding the client may ask for; empty for tiny bodies
+    if len(data) < MIN_SIZE:
+        return {}
+    gzip_level, brotli_quality = levels
+    encodings = {"gzip": gzip.compress(data, compresslevel=gzip_level, mtime=0)}
+    if brotli is not None:
+        encodings["br"] = brotli.compress(data, quality=brotli_quality)
+    return encodings
+
+
+def choose_encoding(encodings):
+    accepted = flask.request.accept_encodings
+    for name in ("br", "gzip"):
+        if name in encodings and accepted[name] > 0:
+            return name
+    return None
+
+
+def _apply(response, encodings):
+    response.vary.add("Accept-Encoding")
+    name = choose_encoding(encodings)
+    if name is None:
+        return response
+    # Release the file a send_file response would have streamed
+    if hasattr(response.response, "close"):
+        response.response.close()
+    response.direct_passthrough = False
+    response.set_data(encodings[name])
+    response.headers["Content-Encoding"] = name
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f"{etag}-{name}", weak=weak)
+    return response
+
+
+def response_cache_key(body):
+    # (dataset, digest of the callback's outputs, inputs and state); the
+    # dataset comes first so FigureCache.invalidate(dataset) finds it
+    payload = json.dumps([body.get("output"), body.get("inputs"), body.get("state")], sort_keys=True)
+    return (callback_dataset(body), hashlib.sha1(payload.encode("utf-8")).hexdigest())
+
+
+def _compressible(response):
+    return response.mimetype.startswith(COMPRESSIBLE_TYPES)
+
+
+def init_app(app, maxsize=256, static_paths=(), layout_key=None):
+    # static_paths: extra routes whose responses never change for a given
+    # URL (e.g. a versioned file route), cached like the Dash bundles.
+    # layout_key() -> response cache key of the layout the current request
+    # gets, for layouts that depend on more than the app (None: not cached)
+    server = app.server
+    responses = FigureCache("response", maxsize=maxsize)
+    static = FigureCache("static", maxsize=maxsize)
+    prefix = app.config.routes_pathname_prefix
+    static_prefixes = (
+        prefix + "_dash-component-suites/",
+        prefix + app.config.assets_url_path.strip("/") + "/",
+    ) + tuple(static_paths)
+
+    @server.before_request
+    def _serve_precompressed():
+        if flask.request.path.endswith("_dash-update-component"):
+            body = flask.request.get_json(silent=True)
+            if not isinstance(body, dict):
+                return None
+            key = response_cache_key(body)
+        elif layout_key is not None and flask.request.path == prefix + "_dash-layout":
+            key = layout_key()
+        else:
+            return None
+        flask.g.response_key = key
+        flask.g.response_generation = responses.generation
+        if not (flask.request.accept_encodings["gzip"] or flask.request.accept_encodings["br"]):
+            return None
+        encodings = responses.get(key)
+        if not encodings or choose_encoding(encodings) is None:
+            return None
+        flask.g.response_cached = True
+        return _apply(flask.Response(b"", mimetype="application/json"), encodings)
+
+    @server.after_request
+    def _compress(response):
+        if response.status_code != 200 or "Content-Encoding" in response.headers:
+            return response
+        if getattr(flask.g, "response_cached", False):
+            return response
+        key = getattr(flask.g, "response_key", None)
+        if key is not None:
+            encodings = encode(response.get_data())
+            responses.put(key, encodings, flask.g.response_generation)
+            return _apply(response, encodings)
+        if flask.request.method != "GET" or not _compressible(response):
+            return response
+        response.direct_passthrough = False
+        if not flask.request.path.startswith(static_prefixes):
+            return _apply(response, encode(response.get_data(), PER_REQUEST_LEVELS))
+        static_key = (flask.request.path, flask.request.query_string, response.get_etag()[0])
+        encodings = static.get(static_key)
+        if encodings is None:
+            encodings = encode(response.get_data())
+            static.put(static_key, encodings)
+        return _apply(response, encodings)
+
+    return responses
@@ -0,0 +1,80 @@
+import os
+
+# Named settings profiles for literacy.create_app(). "local" is the
+# development setup (debug server, nothing preloaded); "deployed" is what
+# runs behind gunicorn. Environment variables override single settings in
+# either profile, e.g. PORT=8080 or FIGURE_CACHE_SIZE=512.
+
+PROFILES = {
+    "local": {
+        "host": "127.0.0.1",
+        "port": 8050,
+        "debug": True,
+        "figure_cache_size": 256,
+        "figure_store_dir": "build/figures",
+        "metrics_dir": None,
+        "preload_data": False,
+        "preload_figures": False,
+        "serve_locally": True,
+        "compress": True,
+        "reload_data": True,
+        "reload_interval": 2.0,
+        "json_engine": "auto",
+        "shared_data": False,
+        "shared_data_dir": "build/shared",
+    },
+    "deployed": {
+        "host": "0.0.0.0",
+        "port": 10000,
+        "debug": False,
+        "figure_cache_size": 256,
+        "figure_store_dir": "build/figures",
+        "metrics_dir": None,
+        "preload_data": True,
+        "preload_figures": True,
+        # Dash's JS bundles come from the CDN instead of the workers
+        "serve_locally": False,
+        "compress": True,
+        "reload_data": True,
+        "reload_interval": 2.0,
+        "json_engine": "auto",
+        # Workers map one Arrow copy of the cleaned data (see shared_data.py)
+        "shared_data": True,
+        "shared_data_dir": "build/shared",
+    },
+}
+
+
+def _flag(value):
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+ENV_OVERRIDES = {
+    "HOST": ("host", str),
+    "PORT": ("port", int),
+    "DASH_DEBUG": ("debug", _flag),
+    "FIGURE_CACHE_SIZE": ("figure_cache_size", int),
+    "FIGURE_STORE_DIR": ("figure_store_dir", str),
+    "METRICS_DIR": ("metrics_dir", str),
+    "PRELOAD_DATA": ("preload_data", _flag),
+    "PRELOAD_FIGURES": ("preload_figures", _flag),
+    "SERVE_LOCALLY": ("serve_locally", _flag),
+    "COMPRESS": ("compress", _flag),
+    "RELOAD_DATA": ("reload_data", _flag),
+    "RELOAD_INTERVAL": ("reload_interval", float),
+    "JSON_ENGINE": ("json_engine", str),
+    "SHARED_DATA": ("shared_data", _flag),
+    "SHARED_DATA_DIR": ("shared_data_dir", str),
+}
+
+
+def load_config(profile=None, **overrides):
+    profile = profile or os.environ.get("APP_PROFILE", "deployed")
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown profile {profile!r}, expected one of {sorted(PROFILES)}")
+    config = dict(PROFILES[profile], profile=profile)
+    for env_name, (key, parse) in ENV_OVERRIDES.items():
+        if os.environ.get(env_name):
+            config[key] = parse(os.environ[env_name])
+    config.update(overrides)
+    return config
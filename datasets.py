@@ -0,0 +1,540 @@
+import contextlib
+import contextvars
+import json
+import os
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+import geometry
+import ingest
+import profiling
+
+# Dataset registry. Every entry of the dataset selector (plus a few shared
+# pieces such as the province geometry) registers a loader here, and is
+# only read from disk the first time a callback asks for it. Concurrent
+# first requests for the same entry wait on one load instead of racing.
+#
+# Entries can be rebuilt while the app is serving (see hot_reload.py):
+# rebuild() loads the new values on the side and swaps them in by
+# replacing the values dict in one step, and a request running inside
+# snapshot() keeps reading the dict that was current when it started.
+#
+# With use_snapshot() a shared data snapshot (see shared_data.py) is read
+# before any loader runs, so processes map the cleaned frames instead of
+# each building their own copy.
+
+_loaders = {}
+_sources = {}
+_values = {}
+_locks = {}
+_registry_lock = threading.Lock()
+# name -> (id of the value, deep size), see memory_report
+_sizes = {}
+# Shared snapshot the lazy loads read first (see use_snapshot)
+_snapshot = None
+# The values dict a request is pinned to, and the (names, staged values)
+# of a rebuild in progress on this thread
+_pinned = contextvars.ContextVar("datasets_pinned", default=None)
+_staging = contextvars.ContextVar("datasets_staging", default=None)
+
+
+def register(name, sources=()):
+    def decorator(func):
+        _loaders[name] = func
+        _sources[name] = list(sources)
+        return func
+    return decorator
+
+
+def _lock_for(name):
+    with _registry_lock:
+        return _locks.setdefault(name, threading.Lock())
+
+
+def get(name):
+    staging = _staging.get()
+    if staging is not None and name in staging[0]:
+        # Loaders of a rebuild see each other's new values
+        staged = staging[1]
+        if name not in staged:
+            with profiling.span(f"reload {name}", dataset=name):
+                staged[name] = _loaders[name]()
+        return staged[name]
+
+    values = _pinned.get()
+    if values is None:
+        values = _values
+    try:
+        return values[name]
+    except KeyError:
+        pass
+    with _lock_for(name):
+        if name not in _values:
+            with profiling.span(f"load {name}", dataset=name):
+                value = _snapshot.load(name) if _snapshot is not None else None
+                if value is None:
+                    value = _loaders[name]()
+            with _registry_lock:
+                _values[name] = value
+        return _values[name]
+
+
+def is_loaded(name):
+    return name in _values
+
+
+def names():
+    return list(_loaders)
+
+
+def sources(name):
+    return _sources[name]
+
+
+def load_all():
+    for name in _loaders:
+        get(name)
+
+
+def affected_by(paths):
+    # Entries built from any of the given source files
+    paths = {os.path.normpath(p) for p in paths}
+    return [name for name in _loaders if paths & {os.path.normpath(p) for p in _sources[name]}]
+
+
+def build(names):
+    # {name: value} of the given entries freshly loaded from their sources,
+    # on the side: nothing is registered or swapped in
+    staged = {}
+    token = _staging.set((set(names), staged))
+    try:
+        for name in names:
+            get(name)
+    finally:
+        _staging.reset(token)
+    return staged
+
+
+def rebuild(names):
+    # Load the given entries again and swap them in together. Entries that
+    # were never loaded stay lazy; on an exception nothing is swapped.
+    global _values, _snapshot
+    names = [name for name in names if name in _values]
+    staged = build(names)
+    with _registry_lock:
+        _values = {**_values, **staged}
+        # The snapshot holds the old data; lazy loads go to the sources now
+        _snapshot = None
+    return names
+
+
+def use_snapshot(snapshot):
+    # snapshot.load(name) -> value, or None for entries it doesn't hold
+    global _snapshot
+    _snapshot = snapshot
+
+
+def pin():
+    # Pin this thread's get() calls to the values current now, until
+    # unpin(token); request hooks use this around each request
+    return _pinned.set(_values)
+
+
+def unpin(token):
+    _pinned.reset(token)
+
+
+@contextlib.contextmanager
+def snapshot():
+    token = pin()
+    try:
+        yield
+    finally:
+        unpin(token)
+
+
+def deep_size(value, seen=None):
+    # Deep memory of a registry value in bytes. Objects reachable twice
+    # (e.g. a frame and a view of it in one tuple) are counted once.
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, CountryIndex):
+        return sum(deep_size(df, seen) for df in value._slices.values())
+    if isinstance(value, ProvinceMatrix):
+        return value.values.nbytes + deep_size(value.provinces, seen) + deep_size(value.indicators, seen)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(deep_size(k, seen) + deep_size(v, seen) for k, v in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return sys.getsizeof(value) + sum(deep_size(v, seen) for v in value)
+    return sys.getsizeof(value)
+
+
+def memory_report():
+    # {entry: deep bytes} of the loaded entries, largest first; this is the
+    # data each worker process holds (figure caches not included). Sizes
+    # are kept per loaded value, so only new or reloaded entries are walked.
+    sizes = {}
+    for name, value in list(_values.items()):
+        known = _sizes.get(name)
+        if known is None or known[0] != id(value):
+            known = _sizes[name] = (id(value), deep_size(value))
+        sizes[name] = known[1]
+    return dict(sorted(sizes.items(), key=lambda item: -item[1]))
+
+
+# ISO3 codes and names of the countries the OOS and time-series views can show
+COUNTRIES = {
+    "AFG": "Afghanistan",
+    "BGD": "Bangladesh",
+    "BTN": "Bhutan",
+    "IND": "India",
+    "LKA": "Sri Lanka",
+    "MDV": "Maldives",
+    "NPL": "Nepal",
+    "PAK": "Pakistan",
+}
+
+
+class CountryIndex:
+    # Rows of a multi-country frame partitioned by ISO3 code. The groupby
+    # runs once at load time, so a callback only ever touches the rows of
+    # the country it shows. A country whose rows are contiguous (e.g. a
+    # frame stored grouped, see frame()) gets a view instead of a copy.
+    def __init__(self, df, column):
+        self.column = column
+        self._empty = df.iloc[:0]
+        self._slices = {}
+        for country, rows in df.groupby(column, sort=False, observed=True).indices.items():
+            if rows[-1] - rows[0] + 1 == len(rows):
+                rows = slice(rows[0], rows[-1] + 1)
+            self._slices[country] = df.iloc[rows]
+
+    def frame(self):
+        # All rows, grouped by country in partition order
+        return pd.concat(list(self._slices.values())) if self._slices else self._empty
+
+    def countries(self):
+        return sorted(self._slices)
+
+    def slice(self, country):
+        # Countries without rows get an empty frame with the same columns
+        return self._slices.get(country, self._empty)
+
+
+@register("oos", sources=["data/OOS_Rate_Countries.csv"])
+def load_oos():
+    # Load Out-of-School Rate (OOS) data from UIS. ingest.py keeps a typed
+    # Parquet copy of the CSV and only reads the rows of COUNTRIES from it.
+    df_oos_raw = ingest.load_oos("data/OOS_Rate_Countries.csv", countries=list(COUNTRIES))
+
+    df_oos = df_oos_raw[
+        (df_oos_raw["level"].isin(["prim", "lsec", "usec"])) &
+        (df_oos_raw["value"].notna())
+    ][["country", "year", "value", "sex", "level"]].astype({"sex": str, "level": str})
+    # Values are cached as float32; widen them so hover labels stay clean
+    df_oos["value"] = df_oos["value"].astype("float64").round(6)
+
+    df_oos["Level"] = df_oos["level"].map({
+        "prim": "Primary",
+        "lsec": "Lower Secondary",
+        "usec": "Upper Secondary"
+    })
+    df_oos["Level"] = df_oos["Level"].str.title()
+    df_oos.rename(columns={"year": "Year", "value": "value", "sex": "Gender"}, inplace=True)
+    df_oos["Gender"] = df_oos["Gender"].str.strip().str.lower().map({
+        "mf": "Total", "m": "Male", "f": "Female",
+        "male": "Male", "female": "Female", "total": "Total"
+    })
+    df_oos["indicator"] = df_oos["Level"].map({
+        "Primary": "OOS.1",
+        "Lower Secondary": "OOS.2",
+        "Upper Secondary": "OOS.3"
+    })
+    return CountryIndex(ingest.compact(df_oos), "country")
+
+
+# Map internal names to official province names
+province_name_map = {
+    "Province No. 1": "Koshi",
+    "Province No. 2": "Madhesh",
+    "Province No. 3": "Bagmati",
+    "Province No. 4": "Gandaki",
+    "Province No. 5": "Lumbini",
+    "Province No. 6": "Karnali",
+    "Province No. 7": "Sudurpashchim"
+}
+
+
+@register("geojson", sources=["data/nepal-with-provinces-acesmndr.geojson"])
+def load_geojson():
+    with profiling.span("geojson json.load"):
+        with open("data/nepal-with-provinces-acesmndr.geojson", "r", encoding="utf-8") as f:
+            geojson = json.load(f)
+
+    with profiling.span("geojson province names"):
+        for feature in geojson["features"]:
+            old_name = feature["properties"]["name"]
+            if old_name in province_name_map:
+                feature["properties"]["ADM1_EN"] = province_name_map[old_name]
+            else:
+                # If the name is already a proper province name, use it directly
+                feature["properties"]["ADM1_EN"] = old_name
+
+    # Simplify and quantize the province polygons once. The browser fetches
+    # them a single time and reuses them for every choropleth, so map
+    # callbacks only carry the province values.
+    with profiling.span("geojson simplify"):
+        geojson = geometry.simplify_geojson(
+            geojson,
+            tolerance=float(os.environ.get("GEOJSON_SIMPLIFY_TOLERANCE", 0.003)),
+            precision=int(os.environ.get("GEOJSON_PRECISION", 4)),
+        )
+        geojson_bytes, geojson_version = geometry.encode_geojson(geojson)
+    return geojson, geojson_bytes, geojson_version
+
+
+def provinces():
+    # Canonical province order: the ADM1_EN keys in GeoJSON feature order
+    return [feature["properties"]["ADM1_EN"] for feature in get("geojson")[0]["features"]]
+
+
+class ProvinceMatrix:
+    # Numeric indicator columns of a per-province table as one read-only
+    # float64 matrix (provinces x indicators), rows in provinces() order.
+    # The matrix is column-major, so column() is a zero-copy view and the
+    # callbacks never re-slice or re-coerce the source frame.
+    def __init__(self, df, province_column, indicators):
+        self.provinces = provinces()
+        self.indicators = list(indicators)
+        self._positions = {indicator: i for i, indicator in enumerate(self.indicators)}
+        self._rows = {province: i for i, province in enumerate(self.provinces)}
+        table = df.drop_duplicates(province_column).set_index(province_column).reindex(self.provinces)
+        values = table[self.indicators].apply(pd.to_numeric, errors="coerce").to_numpy(dtype="float64")
+        self.values = np.asfortranarray(values)
+        self.values.flags.writeable = False
+
+    def __contains__(self, indicator):
+        return indicator in self._positions
+
+    def column(self, indicator):
+        return self.values[:, self._positions[indicator]]
+
+    def value(self, province, indicator):
+        # None for provinces the table doesn't cover
+        if province not in self._rows:
+            return None
+        return self.column(indicator)[self._rows[province]]
+
+
+@register("table_6_1", sources=["data/table-6.1-literacy-rates-by-sex-percent.csv"])
+def load_table_6_1():
+    df = pd.read_csv("data/table-6.1-literacy-rates-by-sex-percent.csv")
+    df_clean = df.iloc[3:10, [0, 1, 2, 3]]
+    df_clean.columns = ["Province", "Male", "Female", "Total"]
+    df_clean["Total"] = pd.to_numeric(df_clean["Total"], errors="coerce")
+    # Standardize province name in df_clean to match GeoJSON
+    df_clean["Province"] = df_clean["Province"].replace({
+        "Sudur Pashchim": "Sudurpashchim",
+        "Sudurpaschim": "Sudurpashchim"
+    })
+    return ingest.compact(df_clean)
+
+
+@register("table_6_1_matrix", sources=["data/table-6.1-literacy-rates-by-sex-percent.csv", "data/nepal-with-provinces-acesmndr.geojson"])
+def load_table_6_1_matrix():
+    return ProvinceMatrix(get("table_6_1"), "Province", ["Male", "Female", "Total"])
+
+
+@register("table_6_2", sources=["data/table-6.2-literacy-rates-by-age-group-sex-and-urban_rural-area-percent.csv"])
+def load_table_6_2():
+    df_6_2 = pd.read_csv("data/table-6.2-literacy-rates-by-age-group-sex-and-urban_rural-area-percent.csv", skiprows=1)
+    df_6_2.columns = df_6_2.columns.str.strip()
+    return ingest.compact(df_6_2)
+
+
+@register("table_6_3", sources=["data/6.3-literacy-rates-in-nepal-by-age-group-sex-and-poverty-status-percent.csv"])
+def load_table_6_3():
+    df_6_3 = pd.read_csv("data/6.3-literacy-rates-in-nepal-by-age-group-sex-and-poverty-status-percent.csv", skiprows=1)
+    df_6_3.columns = df_6_3.columns.str.strip()
+    return ingest.compact(df_6_3)
+
+
+@register("table_6_2_long", sources=["data/table-6.2-literacy-rates-by-age-group-sex-and-urban_rural-area-percent.csv"])
+def load_table_6_2_long():
+    # Urban/rural totals per age group in long format, as update_map plots them
+    df_6_2_long = get("table_6_2").melt(id_vars="Age group", value_vars=["Total in urban", "Total in Rural"],
+                                        var_name="Area", value_name="Literacy Rate (%)")
+    df_6_2_long["Area"] = df_6_2_long["Area"].replace({
+        "Total in urban": "Urban",
+        "Total in Rural": "Rural"
+    })
+    return ingest.compact(df_6_2_long)
+
+
+@register("table_6_3_long", sources=["data/6.3-literacy-rates-in-nepal-by-age-group-sex-and-poverty-status-percent.csv"])
+def load_table_6_3_long():
+    # One row per (age group, gender/poverty status), with the poverty group
+    # precomputed so the split view only has to slice
+    df_6_3_fixed = get("table_6_3").copy()
+    df_6_3_fixed.set_index("Gender/Poverty Status", inplace=True)
+    df_6_3_fixed = df_6_3_fixed.drop(columns=["Total"], errors="ignore").T
+    df_6_3_fixed.reset_index(inplace=True)
+    df_6_3_fixed = df_6_3_fixed.rename(columns={"index": "Age group"})
+
+    df_6_3_long = df_6_3_fixed.melt(id_vars="Age group", var_name="Status", value_name="Literacy Rate (%)")
+    status = df_6_3_long["Status"].str.lower()
+    df_6_3_long["non_poor"] = status.str.contains("non")
+    df_6_3_long["poor"] = status.str.contains("poor") & ~df_6_3_long["non_poor"]
+    return ingest.compact(df_6_3_long)
+
+
+@register("table_13", sources=["data/individual-table-13-population-aged-5-years-and-above-by-literacy-status-by-province.csv"])
+def load_table_13():
+    df_13_raw = pd.read_csv("data/individual-table-13-population-aged-5-years-and-above-by-literacy-status-by-province.csv", header=None)
+    df_13_raw.columns = df_13_raw.iloc[0]  # First row becomes header
+    df_13 = df_13_raw[1:].copy()  # Drop the first row now that it's the header
+    df_13.rename(columns={df_13.columns[0]: "Province"}, inplace=True)
+    df_13.columns = df_13.columns.str.strip()
+    return ingest.compact(df_13)
+
+
+@register("table_13_matrix", sources=["data/individual-table-13-population-aged-5-years-and-above-by-literacy-status-by-province.csv", "data/nepal-with-provinces-acesmndr.geojson"])
+def load_table_13_matrix():
+    df_13 = get("table_13")
+    indicators = [col for col in df_13.columns[1:] if pd.notna(col) and col != "Category"]
+    return ProvinceMatrix(df_13.iloc[1:], "Province", indicators)
+
+
+@register("table_13_weighted", sources=["data/individual-table-13-population-aged-5-years-and-above-by-literacy-status-by-province.csv"])
+def load_table_13_weighted():
+    # Weighted literacy analysis (normalized illiteracy rate by province)
+    df_13_weighted = get("table_13").iloc[1:].copy()
+    df_13_weighted.rename(columns={df_13_weighted.columns[0]: "Province"}, inplace=True)
+
+    total_col = "Population aged 5 years & above"
+    cannot_read_col = "Can't read & write"
+
+    df_13_weighted["Total Population"] = pd.to_numeric(df_13_weighted[total_col], errors="coerce")
+    df_13_weighted["Cannot Read and Write"] = pd.to_numeric(df_13_weighted[cannot_read_col], errors="coerce")
+
+    # Normalize illiteracy by population
+    df_13_weighted["Normalized Illiteracy Rate (%)"] = (
+        df_13_weighted["Cannot Read and Write"] / df_13_weighted["Total Population"] * 100
+    )
+
+    # Drop rows with missing data
+    df_13_weighted.dropna(subset=["Province", "Normalized Illiteracy Rate (%)"], inplace=True)
+    return ingest.compact(df_13_weighted)
+
+
+@register("table_13_weighted_matrix", sources=["data/individual-table-13-population-aged-5-years-and-above-by-literacy-status-by-province.csv", "data/nepal-with-provinces-acesmndr.geojson"])
+def load_table_13_weighted_matrix():
+    return ProvinceMatrix(get("table_13_weighted"), "Province", ["Normalized Illiteracy Rate (%)"])
+
+
+@register("table_14", sources=["data/individual-table-14-population-aged-5-years-and-above-by-educational-attainment.csv"])
+def load_table_14():
+    df_14 = pd.read_csv("data/individual-table-14-population-aged-5-years-and-above-by-educational-attainment.csv", skiprows=1)
+    df_14.rename(columns={df_14.columns[0]: "Province"}, inplace=True)
+    df_14.columns = df_14.columns.str.strip()
+    return ingest.compact(df_14)
+
+
+@register("table_14_matrix", sources=["data/individual-table-14-population-aged-5-years-and-above-by-educational-attainment.csv", "data/nepal-with-provinces-acesmndr.geojson"])
+def load_table_14_matrix():
+    df_14 = get("table_14")
+    df_14 = df_14[df_14["Province"] != "Nepal"]
+    return ProvinceMatrix(df_14, "Province", [col for col in df_14.columns[1:] if pd.notna(col)])
+
+
+@register("table_6_11", sources=["data/table-6.11_NER Nepal Living Standards Survey IV 2023.xlsx"])
+def load_table_6_11():
+    # Both sheets come from one workbook pass, snapshotted by ingest.py
+    return ingest.load_workbook("data/table-6.11_NER Nepal Living Standards Survey IV 2023.xlsx", ["NER Data", "GER Data"])
+
+
+def _table_6_11_sheet(sheet_name):
+    # Load NER and GER datasets from Excel with correct header assignment (row 0 as header, data starts from row 1)
+    df_raw = get("table_6_11")[sheet_name].copy()
+    df_raw.columns = df_raw.iloc[0]  # Assign row 0 as header
+    df_raw = df_raw[1:].copy()
+    df_raw.columns = df_raw.columns.str.strip()
+    df_raw.rename(columns={df_raw.columns[0]: "Category", df_raw.columns[1]: "Region"}, inplace=True)
+    return ingest.compact(df_raw)
+
+
+@register("ner", sources=["data/table-6.11_NER Nepal Living Standards Survey IV 2023.xlsx"])
+def load_ner():
+    df_ner = _table_6_11_sheet("NER Data")
+    ner_provinces = df_ner[df_ner["Category"] == "Province"]
+    return df_ner, ner_provinces
+
+
+@register("ner_matrix", sources=["data/table-6.11_NER Nepal Living Standards Survey IV 2023.xlsx", "data/nepal-with-provinces-acesmndr.geojson"])
+def load_ner_matrix():
+    # Rates as stored in the workbook (fractions); the map scales them to percent
+    ner_provinces = get("ner")[1]
+    return ProvinceMatrix(ner_provinces, "Region", [col for col in ner_provinces.columns[2:] if pd.notna(col)])
+
+
+@register("ger", sources=["data/table-6.11_NER Nepal Living Standards Survey IV 2023.xlsx"])
+def load_ger():
+    df_ger = _table_6_11_sheet("GER Data")
+    ger_provinces = df_ger[df_ger["Category"] == "Province"]
+    return df_ger, ger_provinces
+
+
+@register("ger_matrix", sources=["data/table-6.11_NER Nepal Living Standards Survey IV 2023.xlsx", "data/nepal-with-provinces-acesmndr.geojson"])
+def load_ger_matrix():
+    ger_provinces = get("ger")[1]
+    return ProvinceMatrix(ger_provinces, "Region", [col for col in ger_provinces.columns[2:] if pd.notna(col)])
+
+
+def _add_indicator_columns(df, family, indicator_prefix):
+    # Level, indicator and Gender from the indicatorId code (see ingest.py);
+    # rows of other indicator families get no Level/indicator
+    parsed = ingest.parse_indicator_ids(df["indicatorId"])
+    own = parsed["family"] == family
+    df["Level"] = parsed["level_name"].where(own)
+    df["indicator"] = parsed["level"].cat.rename_categories(lambda level: f"{indicator_prefix}.{level}").where(own)
+    df["Gender"] = parsed["sex"]
+
+
+@register("ger_time", sources=["data/gdata2.csv", "data/gdata3.csv", "data/ndata1.csv", "data/ndata2.csv"])
+def load_ger_time():
+    # Load GER Time Series datasets
+    df_ger2 = pd.read_csv("data/gdata2.csv")
+    df_ger2.columns = df_ger2.columns.str.strip()
+    df_ger3 = pd.read_csv("data/gdata3.csv")
+    df_ger3.columns = df_ger3.columns.str.strip()
+
+    df_ger_time = pd.concat([df_ger2, df_ger3], ignore_index=True)
+    df_ger_time.rename(columns={"year": "Year"}, inplace=True)
+
+    _add_indicator_columns(df_ger_time, family="GER", indicator_prefix="GER")
+
+    # Load NER Time Series datasets
+    df_ner1 = pd.read_csv("data/ndata1.csv")
+    df_ner2 = pd.read_csv("data/ndata2.csv")
+
+    df_ner1.columns = df_ner1.columns.str.strip()
+    df_ner2.columns = df_ner2.columns.str.strip()
+
+    df_ner_time = pd.concat([df_ner1, df_ner2], ignore_index=True)
+    df_ner_time.rename(columns={"year": "Year"}, inplace=True)
+
+    # indicator assignment: NERT.n codes map to NER.1, NER.2, NER.3
+    _add_indicator_columns(df_ner_time, family="NERT", indicator_prefix="NER")
+
+    return CountryIndex(ingest.compact(df_ger_time), "geoUnit"), CountryIndex(ingest.compact(df_ner_time), "geoUnit")
@@ -0,0 +1,247 @@
+import argparse
+import gzip
+import hashlib
+import html as html_lib
+import json
+import os
+import re
+import shutil
+import sys
+import time
+
+# Static export of the whole dashboard. Every reachable map and sidebar
+# output is rendered once into a gzipped JSON asset, next to an index.html
+# shell that swaps them in the browser, so the result can be served by any
+# static file host with no Python on the request path.
+#   python export.py build [--out build/static]
+
+os.chdir(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.getcwd())
+
+import dash
+import plotly
+import plotly.utils
+from dash.development.base_component import Component
+
+import datasets
+import literacy
+from config import load_config
+from figure_cache import serialize
+
+
+def key_json(key):
+    # Same text JSON.stringify produces for the key in the shell
+    return json.dumps(list(key), separators=(",", ":"), ensure_ascii=False)
+
+
+def _css(style):
+    return ";".join(f"{re.sub('([A-Z])', lambda m: '-' + m.group(1).lower(), k)}:{v}" for k, v in style.items())
+
+
+def component_html(value):
+    # Static HTML for the html.* children the sidebar callback returns
+    if value is None or isinstance(value, type(dash.no_update)):
+        return ""
+    if isinstance(value, (list, tuple)):
+        return "".join(component_html(v) for v in value)
+    if isinstance(value, Component):
+        props = value.to_plotly_json()["props"]
+        tag = type(value).__name__.lower()
+        style = f' style="{html_lib.escape(_css(props["style"]))}"' if props.get("style") else ""
+        return f"<{tag}{style}>{component_html(props.get('children'))}</{tag}>"
+    return html_lib.escape(str(value))
+
+
+def _relink_geojson(figure, url, static_url):
+    # The app serves the province geometry from a Flask route; point the
+    # traces at the exported copy instead
+    for trace in (figure or {}).get("data", []):
+        if trace.get("geojson") == url:
+            trace["geojson"] = static_url
+
+
+def _write_asset(out, value):
+    # Content-addressed, so identical outputs (e.g. both view modes of a
+    # map) are stored and downloaded once
+    data = json.dumps(value, cls=plotly.utils.PlotlyJSONEncoder, separators=(",", ":")).encode("utf-8")
+    name = hashlib.sha1(data).hexdigest()[:16] + ".json.gz"
+    path = os.path.join(out, "assets", name)
+    if not os.path.exists(path):
+        with open(path, "wb") as f:
+            f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    return name
+
+
+def build(out):
+    # The callbacks build URLs through dash.get_relative_path, which needs an app
+    literacy.create_app(load_config("local"))
+    os.makedirs(os.path.join(out, "assets"), exist_ok=True)
+    os.makedirs(os.path.join(out, "geo"), exist_ok=True)
+
+    _, geojson_bytes, geojson_version = datasets.get("geojson")
+    geojson_name = f"geo/provinces.{geojson_version}.geojson"
+    with open(os.path.join(out, geojson_name), "wb") as f:
+        f.write(geojson_bytes)
+    shutil.copy(os.path.join(os.path.dirname(plotly.__file__), "package_data", "plotly.min.js"), out)
+
+    geojson_url = literacy.province_geojson_url()
+    map_inputs, sidebar_inputs = literacy.reachable_inputs()
+    index = {"map": {}, "sidebar": {}}
+    for args in map_inputs:
+        figure = serialize(literacy.update_map(*args))
+        _relink_geojson(figure, geojson_url, geojson_name)
+        index["map"][key_json(literacy.map_cache_key(*args))] = _write_asset(out, figure)
+    for args in sidebar_inputs:
+        figure, children = literacy.update_sidebar_chart(*args)
+        keep_figure = isinstance(figure, type(dash.no_update))
+        value = {
+            "figure": None if keep_figure else serialize(figure),
+            "keep_figure": keep_figure,
+            "html": component_html(children),
+        }
+        index["sidebar"][key_json(literacy.sidebar_cache_key(*args))] = _write_asset(out, value)
+
+    shell_data = {
+        "datasets": literacy.DATASET_OPTIONS,
+        "countries": literacy.COUNTRY_OPTIONS,
+        "view_modes": literacy.VIEW_MODE_OPTIONS,
+        "country_datasets": literacy.COUNTRY_DATASETS,
+        "click_datasets": ["table_6_1", "table_13_weighted"],
+        "manifest": literacy.indicator_manifest(),
+        "index": index,
+    }
+    shell = SHELL.replace("__BUILD__", json.dumps(shell_data, separators=(",", ":")).replace("</", "<\\/"))
+    with open(os.path.join(out, "index.html"), "w", encoding="utf-8") as f:
+        f.write(shell)
+    return len(map_inputs) + len(sidebar_inputs), len(os.listdir(os.path.join(out, "assets")))
+
+
+SHELL = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>Nepal Literacy Rates</title>
+<script src="plotly.min.js"></script>
+<style>
+body { font-family: sans-serif; margin: 0; }
+.selector { padding: 0 30px; }
+.selector select { width: 50%; margin-bottom: 20px; }
+#info-box select { width: 100%; margin-bottom: 20px; }
+label { font-weight: bold; display: block; }
+</style>
+</head>
+<body>
+<h1 style="text-align:center">Nepal Literacy Map</h1>
+<div class="selector"><label for="dataset-selector">Select Dataset:</label><select id="dataset-selector"></select></div>
+<div class="selector" id="country-wrapper" style="display:none"><label for="country-selector">Select Country:</label><select id="country-selector"></select></div>
+<div style="display:flex;justify-content:space-between">
+  <div id="map" style="height:80vh;width:70vw"></div>
+  <div id="info-box" style="padding:20px;font-size:16px;width:25vw;height:80vh;overflow-y:auto;display:inline-block;vertical-align:top;border-left:2px solid #ccc;background-color:#f9f9f9">
+    <div id="province-data" style="margin-bottom:20px"></div>
+    <div id="indicator-wrapper" style="display:none"><label for="indicator-selector">Select Indicator:</label><select id="indicator-selector"></select></div>
+    <div id="viewmode-wrapper" style="display:none"><label for="view-selector">Select View Mode (6.3 only):</label><select id="view-selector"></select></div>
+    <div id="sidebar-chart-wrapper"><div id="sidebar-chart"></div></div>
+  </div>
+</div>
+<script>
+const BUILD = __BUILD__;
+const $ = (id) => document.getElementById(id);
+const assets = {};
+const latest = {map: 0, sidebar: 0};
+let clicked = null;
+let mapReady = false;
+
+function fill(select, options, value) {
+  select.innerHTML = "";
+  for (const o of options) {
+    select.add(new Option(o.label, o.value, false, o.value === value));
+  }
+}
+
+function value(id) {
+  const v = $(id).value;
+  return v === "" ? null : v;
+}
+
+function asset(kind, key) {
+  const name = BUILD.index[kind][JSON.stringify(key)];
+  if (!name) return Promise.resolve(undefined);
+  if (!assets[name]) {
+    assets[name] = fetch("assets/" + name).then((r) =>
+      new Response(r.body.pipeThrough(new DecompressionStream("gzip"))).json());
+  }
+  return assets[name];
+}
+
+function show(kind, key, apply) {
+  // Drop responses that arrive after a newer selection
+  const seq = ++latest[kind];
+  asset(kind, key).then((v) => { if (seq === latest[kind] && v !== undefined) apply(v); });
+}
+
+function renderMap() {
+  const d = value("dataset-selector");
+  const key = BUILD.country_datasets.includes(d)
+    ? [d, value("view-selector"), value("indicator-selector"), value("country-selector")]
+    : [d, value("view-selector"), value("indicator-selector")];
+  show("map", key, (fig) => {
+    Plotly.react("map", fig ? fig.data : [], fig ? fig.layout : {});
+    if (!mapReady) {
+      $("map").on("plotly_click", (ev) => { clicked = ev.points[0].location; renderSidebar(); });
+      mapReady = true;
+    }
+  });
+}
+
+function renderSidebar() {
+  const d = value("dataset-selector");
+  const province = BUILD.click_datasets.includes(d) ? clicked : null;
+  show("sidebar", [d, value("indicator-selector"), province], (v) => {
+    $("province-data").innerHTML = v.html;
+    if (!v.keep_figure) {
+      Plotly.react("sidebar-chart", v.figure ? v.figure.data : [], v.figure ? v.figure.layout : {});
+    }
+  });
+}
+
+function onDataset() {
+  const d = value("dataset-selector");
+  const [options, indicator, indicatorStyle, viewStyle, sidebarStyle] = BUILD.manifest[d] || BUILD.manifest.__default__;
+  fill($("indicator-selector"), options, indicator);
+  $("indicator-wrapper").style.display = indicatorStyle.display;
+  $("viewmode-wrapper").style.display = viewStyle.display;
+  $("sidebar-chart-wrapper").style.display = sidebarStyle.display;
+  $("country-wrapper").style.display = BUILD.country_datasets.includes(d) ? "block" : "none";
+  renderMap();
+  renderSidebar();
+}
+
+fill($("dataset-selector"), BUILD.datasets, "table_6_1");
+fill($("country-selector"), BUILD.countries, "NPL");
+fill($("view-selector"), BUILD.view_modes, "split");
+$("dataset-selector").addEventListener("change", onDataset);
+$("indicator-selector").addEventListener("change", () => { renderMap(); renderSidebar(); });
+$("view-selector").addEventListener("change", renderMap);
+$("country-selector").addEventListener("change", renderMap);
+onDataset();
+</script>
+</body>
+</html>
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Static export of the dashboard")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build_parser = sub.add_parser("build", help="render every output into a static site")
+    build_parser.add_argument("--out", default="build/static")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    outputs, files = build(args.out)
+    size = sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(args.out) for name in names)
+    print(f"exported {outputs} outputs as {files} assets into {args.out} ({size / 2**20:.1f} MB) in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import functools
+import threading
+from collections import Counter, OrderedDict
+
+import plotly.graph_objs as go
+
+import serialization
+
+# Memoization for callback outputs. Figures are stored already serialized
+# (plain JSON types), so a cache hit skips both the px build and the
+# Plotly encoder.
+
+
+def serialize(value):
+    if isinstance(value, go.Figure):
+        return serialization.figure_dict(value)
+    if isinstance(value, tuple):
+        return tuple(serialize(v) for v in value)
+    return value
+
+
+_MISSING = object()
+
+
+class FigureCache:
+    def __init__(self, name, maxsize=256, store=None):
+        self.name = name
+        self.maxsize = maxsize
+        # Optional FigureStore of prerendered outputs, consulted on a miss
+        # before building the figure
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+        self.hits_by_dataset = Counter()
+        self.misses_by_dataset = Counter()
+        # Figures actually built (misses not served by the store)
+        self.builds = 0
+        # Bumped by invalidate(), so values built from data older than the
+        # invalidation are not stored (see put)
+        self.generation = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        # Counted lookup without building; default on a miss
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self.hits_by_dataset[key[0]] += 1
+                return self._entries[key]
+            self.misses += 1
+            self.misses_by_dataset[key[0]] += 1
+            return default
+
+    def put(self, key, value, generation=None):
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get_or_build(self, key, build):
+        generation = self.generation
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        value = self.store.load(self.name, key) if self.store else None
+        if value is None:
+            with self._lock:
+                self.builds += 1
+            value = serialize(build())
+        self.put(key, value, generation)
+        return value
+
+    def memoize(self, key=None):
+        # key(*args) -> hashable tuple; the first element must be the
+        # dataset id so invalidate(dataset) can find the entries.
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args):
+                cache_key = key(*args) if key else args
+                return self.get_or_build(cache_key, lambda: func(*args))
+            wrapper.cache = self
+            return wrapper
+        return decorator
+
+    def invalidate(self, dataset=None):
+        # Drop every entry, or only the ones built from one dataset
+        # (call this after reloading that dataset's source data).
+        with self._lock:
+            self.generation += 1
+            # Prerendered artifacts were built from the old data
+            self.store = None
+            if dataset is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if k[0] == dataset]:
+                    del self._entries[key]
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = self.misses = self.builds = 0
+            self.hits_by_dataset.clear()
+            self.misses_by_dataset.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "name": self.name,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "builds": self.builds,
+                "hit_ratio": self.hits / total if total else 0.0,
+            }
@@ -0,0 +1,88 @@
+import hashlib
+import importlib.metadata
+import json
+import mmap
+import os
+
+import dash
+import plotly.utils
+
+# On-disk artifact directory of prerendered callback outputs (written by
+# prerender.py). Files are only trusted while the data fingerprint in the
+# manifest matches the current data/ directory, and the code fingerprint
+# the modules and libraries that build the figures.
+
+MANIFEST = "manifest.json"
+# What a prerendered output depends on besides data/
+FIGURE_CODE = ("literacy.py", "datasets.py", "ingest.py", "geometry.py", "figure_cache.py", "serialization.py")
+FIGURE_PACKAGES = ("dash", "plotly", "pandas")
+
+
+def data_fingerprint(data_dir="data"):
+    digest = hashlib.sha1()
+    for name in sorted(os.listdir(data_dir)):
+        if name.startswith("."):
+            continue
+        stat = os.stat(os.path.join(data_dir, name))
+        digest.update(f"{name}:{stat.st_size}:{stat.st_mtime_ns}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def code_fingerprint(paths=FIGURE_CODE, packages=FIGURE_PACKAGES):
+    # Content of the given source files and versions of the given packages
+    digest = hashlib.sha1()
+    for path in paths:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    for package in packages:
+        digest.update(f"{package}=={importlib.metadata.version(package)}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _contains_no_update(value):
+    if isinstance(value, tuple):
+        return any(_contains_no_update(v) for v in value)
+    return isinstance(value, type(dash.no_update))
+
+
+class FigureStore:
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path(self, cache_name, key):
+        name = hashlib.sha1(repr((cache_name, key)).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, cache_name, name + ".json")
+
+    def is_current(self, fingerprint, code):
+        try:
+            with open(os.path.join(self.directory, MANIFEST), "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return False
+        return manifest.get("fingerprint") == fingerprint and manifest.get("code") == code
+
+    def write_manifest(self, fingerprint, code, count):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, MANIFEST), "w", encoding="utf-8") as f:
+            json.dump({"fingerprint": fingerprint, "code": code, "count": count}, f)
+
+    def save(self, cache_name, key, value):
+        if _contains_no_update(value):
+            return False
+        path = self.path(cache_name, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"tuple": isinstance(value, tuple), "value": value}, f, cls=plotly.utils.PlotlyJSONEncoder)
+        os.replace(tmp, path)
+        return True
+
+    def load(self, cache_name, key):
+        try:
+            with open(self.path(cache_name, key), "rb") as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                    entry = json.loads(m[:])
+        except (OSError, ValueError):
+            return None
+        value = entry["value"]
+        return tuple(value) if entry["tuple"] else value
@@ -0,0 +1,137 @@
+import json
+import hashlib
+
+# Province geometry pipeline: quantize the coordinates, then simplify the
+# shared province borders once at startup so neighbouring provinces still
+# line up exactly (each shared arc is simplified a single time and reused).
+
+
+def _rings(geometry):
+    if geometry["type"] == "Polygon":
+        return [geometry["coordinates"]]
+    elif geometry["type"] == "MultiPolygon":
+        return geometry["coordinates"]
+    return []
+
+
+def _quantize_ring(ring, precision):
+    out = []
+    for x, y in ring:
+        pt = (round(x, precision), round(y, precision))
+        if not out or out[-1] != pt:
+            out.append(pt)
+    if out[0] != out[-1]:
+        out.append(out[0])
+    return out
+
+
+def _perpendicular_distance(pt, start, end):
+    (x, y), (x1, y1), (x2, y2) = pt, start, end
+    dx, dy = x2 - x1, y2 - y1
+    if dx == 0 and dy == 0:
+        return ((x - x1) ** 2 + (y - y1) ** 2) ** 0.5
+    return abs(dy * x - dx * y + x2 * y1 - y2 * x1) / (dx * dx + dy * dy) ** 0.5
+
+
+def _douglas_peucker(points, tolerance):
+    if len(points) < 3:
+        return list(points)
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        max_dist, index = 0.0, None
+        for i in range(first + 1, last):
+            dist = _perpendicular_distance(points[i], points[first], points[last])
+            if dist > max_dist:
+                max_dist, index = dist, i
+        if index is not None and max_dist > tolerance:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+    return [pt for pt, k in zip(points, keep) if k]
+
+
+def _simplify_arc(arc, tolerance, arc_cache):
+    # Shared borders show up once per neighbour, usually in opposite
+    # directions, so simplify the canonical direction and reuse it.
+    forward = tuple(arc)
+    backward = forward[::-1]
+    key = min(forward, backward)
+    if key not in arc_cache:
+        arc_cache[key] = _douglas_peucker(key, tolerance)
+    simplified = arc_cache[key]
+    return simplified if key == forward else simplified[::-1]
+
+
+def _simplify_ring(ring, owners, tolerance, arc_cache):
+    points = ring[:-1]
+    n = len(points)
+    # A junction is any vertex where the set of rings sharing it changes,
+    # i.e. where one border ends and the next begins.
+    junctions = [
+        i for i in range(n)
+        if owners[points[i]] != owners[points[i - 1]] or owners[points[i]] != owners[points[(i + 1) % n]]
+    ]
+    if not junctions:
+        junctions = [0, n // 2]
+
+    simplified = []
+    for j, start in enumerate(junctions):
+        end = junctions[(j + 1) % len(junctions)]
+        if end > start:
+            arc = points[start:end + 1]
+        else:
+            arc = points[start:] + points[:end + 1]
+        simplified.extend(_simplify_arc(arc, tolerance, arc_cache)[:-1])
+    simplified.append(simplified[0])
+
+    if len(simplified) < 4:
+        return ring
+    return simplified
+
+
+def simplify_geojson(geojson, tolerance=0.005, precision=4, keep_properties=("ADM1_EN",)):
+    features = geojson["features"]
+
+    quantized = []
+    owners = {}
+    for feature in features:
+        polygons = []
+        for polygon in _rings(feature["geometry"]):
+            rings = [_quantize_ring(ring, precision) for ring in polygon]
+            for ring in rings:
+                ring_id = id(ring)
+                for pt in ring:
+                    owners.setdefault(pt, set()).add(ring_id)
+            polygons.append(rings)
+        quantized.append(polygons)
+    owners = {pt: frozenset(ids) for pt, ids in owners.items()}
+
+    arc_cache = {}
+    out_features = []
+    for feature, polygons in zip(features, quantized):
+        coordinates = [
+            [[list(pt) for pt in _simplify_ring(ring, owners, tolerance, arc_cache)] for ring in polygon]
+            for polygon in polygons
+        ]
+        if feature["geometry"]["type"] == "Polygon":
+            geometry = {"type": "Polygon", "coordinates": coordinates[0]}
+        else:
+            geometry = {"type": "MultiPolygon", "coordinates": coordinates}
+        properties = {k: v for k, v in feature["properties"].items() if k in keep_properties}
+        out_features.append({"type": "Feature", "properties": properties, "geometry": geometry})
+
+    return {"type": "FeatureCollection", "features": out_features}
+
+
+def encode_geojson(geojson):
+    # Compact bytes plus a short content hash, used as a cache-busting
+    # version on the URL the browser fetches the geometry from.
+    payload = json.dumps(geojson, separators=(",", ":")).encode("utf-8")
+    return payload, hashlib.sha1(payload).hexdigest()[:12]
+
+
+def vertex_count(geojson):
+    return sum(len(ring) for feature in geojson["features"] for polygon in _rings(feature["geometry"]) for ring in polygon)
@@ -0,0 +1,32 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+# gunicorn -c gunicorn.conf.py wsgi:server
+
+bind = f"{os.environ.get('HOST', '0.0.0.0')}:{os.environ.get('PORT', 10000)}"
+workers = int(os.environ.get("WEB_CONCURRENCY", min(multiprocessing.cpu_count() * 2 + 1, 8)))
+threads = int(os.environ.get("GUNICORN_THREADS", 2))
+worker_class = "gthread" if threads > 1 else "sync"
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 60))
+
+# Load data and warm the figure caches once in the master, then fork
+preload_app = True
+
+# Workers share one metrics directory so /metrics reports every process
+if not os.environ.get("METRICS_DIR"):
+    os.environ["METRICS_DIR"] = tempfile.mkdtemp(prefix="literacy-metrics-")
+
+
+def on_starting(server):
+    shutil.rmtree(os.environ["METRICS_DIR"], ignore_errors=True)
+    os.makedirs(os.environ["METRICS_DIR"], exist_ok=True)
+
+
+def child_exit(server, worker):
+    # A dead worker's counters still count on /metrics; its dataset memory
+    # gauge must not, or every respawn would add another worker's worth
+    import metrics
+
+    metrics.retire(os.environ["METRICS_DIR"], worker.pid)
@@ -0,0 +1,111 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+
+import datasets
+
+# Data hot reload. A DataWatcher polls the source files of the dataset
+# registry; when one changes (size/mtime, confirmed by content hash) it
+# rebuilds only the registry entries built from that file, swaps them in
+# (datasets.rebuild) and reports the rebuilt entries to on_reload, so the
+# app can drop the figures built from them. A source that fails to load
+# (e.g. still being written) keeps the old data and is retried on the next
+# scan.
+
+logger = logging.getLogger(__name__)
+
+
+def file_hash(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _stat_key(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+class DataWatcher:
+    def __init__(self, on_reload=None, interval=2.0):
+        self.on_reload = on_reload
+        self.interval = interval
+        self.reloads = 0
+        # path -> ((size, mtime_ns), sha1) as of the last successful load
+        self._known = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        for path in self.paths():
+            try:
+                self._known[path] = (_stat_key(path), file_hash(path))
+            except OSError:
+                pass
+
+    def paths(self):
+        return sorted({path for name in datasets.names() for path in datasets.sources(name)})
+
+    def changed(self):
+        # [(path, stat key, sha1)] of sources whose content differs from
+        # the last successful load
+        changed = []
+        for path in self.paths():
+            try:
+                key = _stat_key(path)
+                known = self._known.get(path)
+                if known and known[0] == key:
+                    continue
+                digest = file_hash(path)
+            except OSError:
+                # Removed or mid-replace; keep serving what was loaded
+                continue
+            if known and known[1] == digest:
+                # Touched, same content
+                self._known[path] = (key, digest)
+                continue
+            changed.append((path, key, digest))
+        return changed
+
+    def check(self):
+        # One scan; rebuilds what changed and returns the rebuilt entry names
+        with self._lock:
+            changed = self.changed()
+            if not changed:
+                return []
+            paths = [path for path, _, _ in changed]
+            try:
+                names = datasets.rebuild(datasets.affected_by(paths))
+            except Exception:
+                logger.exception("Reloading %s failed, keeping the current data", ", ".join(paths))
+                return []
+            for path, key, digest in changed:
+                self._known[path] = (key, digest)
+            self.reloads += 1
+        logger.info("Reloaded %s from %s", ", ".join(names) or "nothing", ", ".join(paths))
+        if self.on_reload is not None:
+            self.on_reload(names)
+        return names
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.check()
+            except Exception:
+                logger.exception("Data watcher scan failed")
+
+    def ensure_running(self):
+        # Threads don't survive fork, so every worker process starts its own
+        # watcher (called on each request; cheap once running)
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="data-watcher", daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
@@ -0,0 +1,200 @@
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+import profiling
+
+# Columnar ingest cache for the UIS out-of-school export. The CSV is parsed
+# once into a typed, categorical Parquet file sorted by country, so later
+# loads only read the row groups for the requested countries. The cache
+# file name carries the source size/mtime, so editing the CSV rebuilds it.
+
+CACHE_DIR = os.environ.get("INGEST_CACHE_DIR", ".cache")
+
+OOS_DTYPES = {
+    "name": "category",
+    "country": "category",
+    "level": "category",
+    "sex": "category",
+    "year": "int16",
+    "value": "float32",
+    "lower": "float32",
+    "upper": "float32",
+}
+
+
+def source_key(path):
+    stat = os.stat(path)
+    return hashlib.sha1(f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}".encode("utf-8")).hexdigest()[:16]
+
+
+def content_key(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def cache_path(path, suffix, key=None):
+    name = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(CACHE_DIR, f"{name}.{key or source_key(path)}.{suffix}")
+
+
+def read_oos_csv(path):
+    df = pd.read_csv(path)
+    df.columns = df.columns.str.strip().str.lower()
+    df["country"] = df["country"].str.strip().str.upper()
+    df["name"] = df["name"].str.strip()
+    df["level"] = df["level"].str.strip().str.lower()
+    df["sex"] = df["sex"].str.strip().str.lower()
+    return df.astype(OOS_DTYPES)
+
+
+def _write_oos_parquet(path, target):
+    df = read_oos_csv(path).sort_values(["country", "year"], kind="stable").reset_index(drop=True)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp = target + ".tmp"
+    # Small row groups keep each country in a handful of groups, which is
+    # what lets the country filter skip most of the file.
+    df.to_parquet(tmp, engine="pyarrow", index=False, row_group_size=2048)
+    os.replace(tmp, target)
+
+
+def load_oos(path, countries=None):
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        with profiling.span("oos read csv"):
+            df = read_oos_csv(path)
+        if countries is not None:
+            df = df[df["country"].isin(countries)]
+        return df.reset_index(drop=True)
+
+    target = cache_path(path, "parquet")
+    if not os.path.exists(target):
+        with profiling.span("oos convert csv to parquet"):
+            _write_oos_parquet(path, target)
+    filters = [("country", "in", list(countries))] if countries is not None else None
+    with profiling.span("oos read parquet"):
+        df = pd.read_parquet(target, engine="pyarrow", filters=filters)
+    for col in ["name", "country", "level", "sex"]:
+        df[col] = df[col].cat.remove_unused_categories()
+    return df
+
+
+def _sheet_as_text(df):
+    # header=None sheets mix header text and numbers in one column; as text
+    # they fit Parquet, and compact() parses the numbers the same. Only the
+    # present cells are converted, so blanks stay missing (astype(str)
+    # turns them into "nan" before pandas 3)
+    return df.apply(lambda column: column.map(str, na_action="ignore"))
+
+
+def load_workbook(path, sheet_names):
+    # Read every requested sheet in one openpyxl pass and snapshot the raw
+    # frames as Parquet keyed by the workbook's content hash. Later boots
+    # read the Parquet files and never import openpyxl at all. Without
+    # pyarrow, or if a snapshot can't be read, the workbook is parsed again.
+    targets = {
+        name: cache_path(path, "parquet", key=f"{content_key(path)}-{hashlib.sha1(name.encode('utf-8')).hexdigest()[:8]}")
+        for name in sheet_names
+    }
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        targets = None
+    if targets and all(os.path.exists(target) for target in targets.values()):
+        try:
+            with profiling.span("workbook read snapshot"):
+                sheets = {name: pd.read_parquet(target, engine="pyarrow") for name, target in targets.items()}
+        except (OSError, ValueError):
+            pass
+        else:
+            for df in sheets.values():
+                df.columns = range(df.shape[1])
+            return sheets
+
+    with profiling.span("workbook parse xlsx"):
+        sheets = pd.read_excel(path, sheet_name=list(sheet_names), header=None)
+    sheets = {name: _sheet_as_text(df) for name, df in sheets.items()}
+    if targets:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        for name, target in targets.items():
+            tmp = f"{target}.{os.getpid()}.tmp"
+            sheets[name].set_axis([str(c) for c in sheets[name].columns], axis=1).to_parquet(tmp, engine="pyarrow")
+            os.replace(tmp, target)
+    return sheets
+
+
+# Typed loading stage for the frames the dataset registry keeps. Every
+# conversion is lossless, so figures built from a compacted frame are the
+# same as before: numeric text is parsed only when every value parses,
+# float32 is only used when each value survives the round trip (most
+# survey percentages like 45.3 don't and stay float64), and integers get
+# the smallest type that holds their range.
+INTEGER_DTYPES = ("int16", "int32", "int64")
+# Text columns with at most this share of distinct values become categoricals
+CATEGORY_RATIO = 0.5
+
+
+def _compact_column(column):
+    if isinstance(column.dtype, pd.CategoricalDtype) or pd.api.types.is_bool_dtype(column.dtype):
+        return column
+    present = column.notna()
+    if not present.any():
+        return column
+    if not pd.api.types.is_numeric_dtype(column.dtype):
+        parsed = pd.to_numeric(column, errors="coerce")
+        if not parsed.notna().equals(present):
+            # Labels
+            if column.nunique() <= len(column) * CATEGORY_RATIO:
+                return column.astype("category")
+            return column
+        column = parsed
+    values = column.to_numpy(dtype="float64", na_value=np.nan)
+    if present.all() and np.array_equal(values, np.round(values)):
+        for dtype in INTEGER_DTYPES:
+            info = np.iinfo(dtype)
+            if info.min <= values.min() and values.max() <= info.max:
+                return column.astype(dtype)
+    narrowed = values.astype("float32").astype("float64")
+    if np.array_equal(narrowed, values, equal_nan=True):
+        return column.astype("float32")
+    return column.astype("float64")
+
+
+def compact(df):
+    # Typed copy of a loaded frame (see above); columns are addressed by
+    # position, since raw sheets can repeat or lack header names
+    df = df.copy()
+    for i in range(df.shape[1]):
+        df.isetitem(i, _compact_column(df.iloc[:, i]))
+    return df
+
+
+# UIS indicator codes look like FAMILY.LEVEL[.SEX][.QUALIFIER], e.g. GER.2,
+# GER.2.F or NERT.1.M.CP. Parsing works on the distinct codes only and
+# broadcasts back through the factorized codes, so the cost per row is a
+# single integer take regardless of how many rows the export has.
+INDICATOR_PATTERN = r"^(?P<family>[A-Z]+)\.(?P<level>\d+)(?:\.(?P<sex>[MF]))?(?:\.(?P<qualifier>[A-Z0-9]+))?$"
+LEVEL_NAMES = {"1": "Primary", "2": "Lower Secondary", "3": "Upper Secondary"}
+SEX_NAMES = {"M": "Male", "F": "Female"}
+
+
+def parse_indicator_ids(indicator_ids):
+    codes, uniques = pd.factorize(indicator_ids.astype("string").str.strip())
+    parts = pd.Series(uniques, dtype="string").str.extract(INDICATOR_PATTERN)
+    parts["level_name"] = parts["level"].map(LEVEL_NAMES)
+    parts["sex"] = parts["sex"].map(SEX_NAMES).fillna("Total")
+
+    parsed = pd.DataFrame(index=indicator_ids.index)
+    for col in ["family", "level", "level_name", "sex", "qualifier"]:
+        categories = pd.Index(parts[col].astype(object).unique()).dropna()
+        per_unique = pd.Categorical(parts[col].astype(object), categories=categories).codes
+        # factorize marks missing ids as -1; the appended -1 keeps them NaN
+        row_codes = np.append(per_unique, -1)[codes]
+        parsed[col] = pd.Categorical.from_codes(row_codes, categories=categories)
+    return parsed
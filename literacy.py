@@ -1,293 +1,259 @@
-import json
-import pandas as pd
-import plotly.express as px
-import dash
-from dash import dcc, html, Input, Output
-
-# Load Out-of-School Rate (OOS) data for Nepal from UIS
-df_oos_raw = pd.read_csv("data/OOS_Rate_Countries.csv")
-df_oos_raw.columns = df_oos_raw.columns.str.strip().str.lower()
-
-df_oos_nepal = df_oos_raw[
-    (
-        (df_oos_raw["country"].str.strip().str.upper() == "NPL") |
-        (df_oos_raw["name"].str.strip().str.lower() == "nepal")
-    ) &
-    (df_oos_raw["level"].str.strip().str.lower().isin(["prim", "lsec", "usec"])) &
-    (df_oos_raw["value"].notna())
-][["year", "value", "sex", "level"]].copy()
-
-df_oos_nepal["Level"] = df_oos_nepal["level"].map({
-    "prim": "Primary",
-    "lsec": "Lower Secondary",
-    "usec": "Upper Secondary"
-})
-df_oos_nepal["Level"] = df_oos_nepal["Level"].str.title()
-df_oos_nepal.rename(columns={"year": "Year", "value": "value", "sex": "Gender"}, inplace=True)
-df_oos_nepal["Gender"] = df_oos_nepal["Gender"].str.strip().str.lower().map({
-    "mf": "Total", "m": "Male", "f": "Female",
-    "male": "Male", "female": "Female", "total": "Total"
-})
-df_oos_nepal["indicator"] = df_oos_nepal["Level"].map({
-    "Primary": "OOS.1",
-    "Lower Secondary": "OOS.2",
-    "Upper Secondary": "OOS.3"
-})
-
-# Load GeoJSON
-with open("data/nepal-with-provinces-acesmndr.geojson", "r", encoding="utf-8") as f:
-    geojson = json.load(f)
-
-# Map internal names to official province names
-province_name_map = {
-    "Province No. 1": "Koshi",
-    "Province No. 2": "Madhesh",
-    "Province No. 3": "Bagmati",
-    "Province No. 4": "Gandaki",
-    "Province No. 5": "Lumbini",
-    "Province No. 6": "Karnali",
-    "Province No. 7": "Sudurpashchim"
-}
-
-for feature in geojson["features"]:
-    old_name = feature["properties"]["name"]
-    if old_name in province_name_map:
-        feature["properties"]["ADM1_EN"] = province_name_map[old_name]
-    else:
-        # If the name is already a proper province name, use it directly
-        feature["properties"]["ADM1_EN"] = old_name
-
-# Load literacy data
-df = pd.read_csv("data/table-6.1-literacy-rates-by-sex-percent.csv")
-df_clean = df.iloc[3:10, [0, 1, 2, 3]]
-df_clean.columns = ["Province", "Male", "Female", "Total"]
-df_clean["Total"] = pd.to_numeric(df_clean["Total"], errors="coerce")
-# Standardize province name in df_clean to match GeoJSON
-df_clean["Province"] = df_clean["Province"].replace({
-    "Sudur Pashchim": "Sudurpashchim",
-    "Sudurpaschim": "Sudurpashchim"
-})
-
-# Load and clean additional datasets
-df_6_2 = pd.read_csv("data/table-6.2-literacy-rates-by-age-group-sex-and-urban_rural-area-percent.csv", skiprows=1)
-df_6_3 = pd.read_csv("data/6.3-literacy-rates-in-nepal-by-age-group-sex-and-poverty-status-percent.csv", skiprows=1)
-
-df_6_2.columns = df_6_2.columns.str.strip()
-df_6_3.columns = df_6_3.columns.str.strip()
-
-df_13_raw = pd.read_csv("data/individual-table-13-population-aged-5-years-and-above-by-literacy-status-by-province.csv", header=None)
-df_13_raw.columns = df_13_raw.iloc[0]  # First row becomes header
-df_13 = df_13_raw[1:].copy()  # Drop the first row now that it's the header
-df_13.rename(columns={df_13.columns[0]: "Province"}, inplace=True)
-df_13.columns = df_13.columns.str.strip()
-
-# Weighted literacy analysis (normalized illiteracy rate by province)
-df_13_weighted = df_13.iloc[1:].copy()
-df_13_weighted.rename(columns={df_13_weighted.columns[0]: "Province"}, inplace=True)
-
-total_col = "Population aged 5 years & above"
-cannot_read_col = "Can't read & write"
-
-df_13_weighted["Total Population"] = pd.to_numeric(df_13_weighted[total_col], errors="coerce")
-df_13_weighted["Cannot Read and Write"] = pd.to_numeric(df_13_weighted[cannot_read_col], errors="coerce")
-
-
-# Normalize illiteracy by population
-df_13_weighted["Normalized Illiteracy Rate (%)"] = (
-    df_13_weighted["Cannot Read and Write"] / df_13_weighted["Total Population"] * 100
-)
-
-# Drop rows with missing data
-df_13_weighted.dropna(subset=["Province", "Normalized Illiteracy Rate (%)"], inplace=True)
-
-df_14 = pd.read_csv("data/individual-table-14-population-aged-5-years-and-above-by-educational-attainment.csv", skiprows=1)
-df_14.rename(columns={df_14.columns[0]: "Province"}, inplace=True)
-df_14.columns = df_14.columns.str.strip()
-
- # df_ofst is deprecated and replaced by df_oos_nepal
- # Load NER and GER datasets from Excel with correct header assignment (row 0 as header, data starts from row 1)
-df_ner_raw = pd.read_excel("data/table-6.11_NER Nepal Living Standards Survey IV 2023.xlsx", sheet_name="NER Data", header=None)
-df_ner_raw.columns = df_ner_raw.iloc[0]  # Assign row 0 as header
-df_ner_raw = df_ner_raw[1:].copy()
-df_ner_raw.columns = df_ner_raw.columns.str.strip()
-
-df_ger_raw = pd.read_excel("data/table-6.11_NER Nepal Living Standards Survey IV 2023.xlsx", sheet_name="GER Data", header=None)
-df_ger_raw.columns = df_ger_raw.iloc[0]
-df_ger_raw = df_ger_raw[1:].copy()
-df_ger_raw.columns = df_ger_raw.columns.str.strip()
-
-df_ner = df_ner_raw.copy()
-df_ger = df_ger_raw.copy()
-
-df_ner.rename(columns={df_ner.columns[0]: "Category", df_ner.columns[1]: "Region"}, inplace=True)
-df_ger.rename(columns={df_ger.columns[0]: "Category", df_ger.columns[1]: "Region"}, inplace=True)
-
-ner_provinces = df_ner[df_ner["Category"] == "Province"]
-ger_provinces = df_ger[df_ger["Category"] == "Province"]
-
-# Load GER Time Series datasets
-df_ger2 = pd.read_csv("data/gdata2.csv")
-df_ger2.columns = df_ger2.columns.str.strip()
-df_ger3 = pd.read_csv("data/gdata3.csv")
-df_ger3.columns = df_ger3.columns.str.strip()
-
-df_ger_time = pd.concat([df_ger2, df_ger3], ignore_index=True)
-
-# Map Level based on indicatorId prefix
-def map_level(indicator):
-    if isinstance(indicator, str):
-        if indicator.startswith("GER.1"):
-            return "Primary"
-        elif indicator.startswith("GER.2"):
-            return "Lower Secondary"
-        elif indicator.startswith("GER.3"):
-            return "Upper Secondary"
+import urllib.parse
+
+import profiling
+
+with profiling.span("import pandas"):
+    import numpy as np
+    import pandas as pd
+with profiling.span("import plotly.express"):
+    import plotly.express as px
+with profiling.span("import dash"):
+    import dash
+    import flask
+    from dash import dcc, html, Input, Output, State, Patch
+
+import compression
+import datasets
+import metrics
+import serialization
+import shared_data
+from hot_reload import DataWatcher
+from config import load_config
+from figure_cache import FigureCache, serialize
+from figure_store import FigureStore, code_fingerprint, data_fingerprint
+
+GEOJSON_PATH = "/geo/provinces.geojson"
+
+DATASET_OPTIONS = [
+    {"label": "Literacy by Province (6.1)", "value": "table_6_1"},
+    {"label": "Literacy by Age & Urban/Rural (6.2)", "value": "table_6_2"},
+    {"label": "Literacy by Age & Poverty (6.3)", "value": "table_6_3"},
+    {"label": "Literacy Status by Province (Table 13)", "value": "table_13"},
+    {"label": "Normalized Illiteracy Rate", "value": "table_13_weighted"},
+    {"label": "Educational Attainment (Table 14)", "value": "table_14"},
+    {"label": "Net Enrollment Rate (NER)", "value": "ner"},
+    {"label": "Gross Enrollment Rate (GER)", "value": "ger"},
+    {"label": "Out-of-School Rate (OOS)", "value": "oos"},
+    {"label": "GER, NER, OOS (Time Series)", "value": "ger_time"},
+]
+
+COUNTRY_OPTIONS = [{"label": name, "value": iso3} for iso3, name in datasets.COUNTRIES.items()]
+
+# Views drawn from the per-country UIS series, driven by the country selector
+COUNTRY_DATASETS = ["oos", "ger_time"]
+
+VIEW_MODE_OPTIONS = [
+    {"label": "Split by Poverty Group", "value": "split"},
+    {"label": "Combined View", "value": "combined"}
+]
+
+
+def province_geojson_url():
+    # Versioned by content hash so browsers can cache the geometry forever
+    geojson_version = datasets.get("geojson")[2]
+    return dash.get_relative_path(GEOJSON_PATH) + "?v=" + geojson_version
+
+
+def serve_province_geojson():
+    geojson_bytes = datasets.get("geojson")[1]
+    response = flask.Response(geojson_bytes, mimetype="application/geo+json")
+    response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    return response
+
+
+def map_cache_key(dataset, view_mode, indicator, country="NPL"):
+    # The country only changes the views built from the per-country series
+    if dataset in COUNTRY_DATASETS:
+        return (dataset, view_mode, indicator, country)
+    return (dataset, view_mode, indicator)
+
+
+def clicked_province(clickData):
+    if clickData and "points" in clickData:
+        return clickData["points"][0].get("location")
     return None
 
-df_ger_time["Level"] = df_ger_time["indicatorId"].apply(map_level)
-# Standardize column names and ensure "Year" is properly recognized
-df_ger_time.columns = df_ger_time.columns.str.strip()
-df_ger_time.rename(columns=lambda x: str(x).strip(), inplace=True)
-if "year" in df_ger_time.columns:
-    df_ger_time.rename(columns={"year": "Year"}, inplace=True)
-df_ger_time["indicator"] = df_ger_time["Level"].map({
-    "Primary": "GER.1",
-    "Lower Secondary": "GER.2",
-    "Upper Secondary": "GER.3"
-})
-# Add Gender and Source columns after indicator is created
-df_ger_time["Gender"] = df_ger_time["indicatorId"].apply(lambda x: "Male" if ".M" in x else "Female" if ".F" in x else "Total")
-
-# Load NER Time Series datasets
-df_ner1 = pd.read_csv("data/ndata1.csv")
-df_ner2 = pd.read_csv("data/ndata2.csv")
-
-df_ner1.columns = df_ner1.columns.str.strip()
-df_ner2.columns = df_ner2.columns.str.strip()
-
-df_ner_time = pd.concat([df_ner1, df_ner2], ignore_index=True)
-
-def map_ner_level(indicator):
-    if isinstance(indicator, str):
-        if "NERT.1" in indicator:
-            return "Primary"
-        elif "NERT.2" in indicator:
-            return "Lower Secondary"
-        elif "NERT.3" in indicator:
-            return "Upper Secondary"
-    return None
 
-df_ner_time["Level"] = df_ner_time["indicatorId"].apply(map_ner_level)
-df_ner_time.columns = df_ner_time.columns.str.strip()
-df_ner_time.rename(columns=lambda x: str(x).strip(), inplace=True)
-if "year" in df_ner_time.columns:
-    df_ner_time.rename(columns={"year": "Year"}, inplace=True)
-# indicator assignment: map Level to NER.1, NER.2, NER.3
-df_ner_time["indicator"] = df_ner_time["Level"].map({
-    "Primary": "NER.1",
-    "Lower Secondary": "NER.2",
-    "Upper Secondary": "NER.3"
-})
-df_ner_time["Gender"] = df_ner_time["indicatorId"].apply(lambda x: "Male" if ".M" in x else "Female" if ".F" in x else "Total")
-
-
-
-
-# Create Dash app
-app = dash.Dash(__name__)
-app.title = "Nepal Literacy Rates"
-
-# Add dataset dropdown above map + sidebar
-app.layout = html.Div([
-    html.H1("Nepal Literacy Map", style={"textAlign": "center"}),
-
-    html.Div([
-        html.Label("Select Dataset:", style={"fontWeight": "bold"}),
-        dcc.Dropdown(
-            id="dataset-selector",
-            options=[
-                {"label": "Literacy by Province (6.1)", "value": "table_6_1"},
-                {"label": "Literacy by Age & Urban/Rural (6.2)", "value": "table_6_2"},
-                {"label": "Literacy by Age & Poverty (6.3)", "value": "table_6_3"},
-                {"label": "Literacy Status by Province (Table 13)", "value": "table_13"},
-                {"label": "Normalized Illiteracy Rate", "value": "table_13_weighted"},
-                {"label": "Educational Attainment (Table 14)", "value": "table_14"},
-                {"label": "Net Enrollment Rate (NER)", "value": "ner"},
-                {"label": "Gross Enrollment Rate (GER)", "value": "ger"},
-                {"label": "Out-of-School Rate (OOS)", "value": "oos"},
-                {"label": "GER, NER, OOS (Time Series)", "value": "ger_time"},
-            ],
-            value="table_6_1",
-            clearable=False,
-            style={"width": "50%", "marginBottom": "20px"}
-        )
-    ], style={"padding": "0 30px"}),
-
-
-    html.Div([
-        dcc.Graph(id="map", style={"height": "80vh", "width": "70vw"}),
-        html.Div(
-            id="info-box",
-            children=[
-                html.Div(id="province-data", style={"marginBottom": "20px"}),
-                html.Div(id="indicator-wrapper", children=[
-                    html.Label("Select Indicator:", style={"fontWeight": "bold"}),
-                    dcc.Dropdown(
-                        id="indicator-selector",
-                        options=[],
-                        value=None,
-                        clearable=False,
-                        style={"width": "100%", "marginBottom": "20px"}
-                    ),
-                ], style={"display": "none"}),
-
-                html.Div(id="viewmode-wrapper", children=[
-                    html.Label("Select View Mode (6.3 only):", style={"fontWeight": "bold"}),
-                    dcc.Dropdown(
-                        id="view-selector",
-                        options=[
-                            {"label": "Split by Poverty Group", "value": "split"},
-                            {"label": "Combined View", "value": "combined"}
+def sidebar_cache_key(dataset, indicator, clickData):
+    # Only the click-through views depend on the clicked province
+    province = None
+    if dataset in ["table_6_1", "table_13_weighted"]:
+        province = clicked_province(clickData)
+    return (dataset, indicator, province)
+
+
+_indicator_manifest = None
+
+
+def indicator_manifest():
+    # Dropdown options, default indicator and wrapper visibility for every
+    # dataset, computed once from update_indicator_dropdown. The page ships
+    # it in a dcc.Store so switching datasets is handled in the browser.
+    global _indicator_manifest
+    if _indicator_manifest is None:
+        manifest = {o["value"]: list(update_indicator_dropdown(o["value"])) for o in DATASET_OPTIONS}
+        manifest["__default__"] = list(update_indicator_dropdown(None))
+        _indicator_manifest = manifest
+    return _indicator_manifest
+
+
+def indicator_manifest_values(dataset):
+    return [o["value"] for o in indicator_manifest().get(dataset, [[]])[0]]
+
+
+def default_selection(dataset="table_6_1", view_mode="split", country="NPL"):
+    # What the map and sidebar render right after `dataset` is picked: its
+    # default indicator from the manifest
+    manifest = indicator_manifest()
+    indicator = manifest.get(dataset, manifest["__default__"])[1]
+    return {"dataset": dataset, "view_mode": view_mode, "indicator": indicator, "country": country}
+
+
+def page_selection(query):
+    # (selection, clicked province) a page URL deep-links to, e.g.
+    # /?dataset=table_13&indicator=Can+read+%26+write&province=Koshi;
+    # also takes view= and country=. Anything unknown falls back to the
+    # defaults.
+    dataset = query.get("dataset")
+    if dataset not in [o["value"] for o in DATASET_OPTIONS]:
+        dataset = "table_6_1"
+    view_mode = query.get("view")
+    if view_mode not in [o["value"] for o in VIEW_MODE_OPTIONS]:
+        view_mode = "split"
+    country = query.get("country")
+    if country not in datasets.COUNTRIES:
+        country = "NPL"
+    selection = default_selection(dataset, view_mode, country)
+    if query.get("indicator") in indicator_manifest_values(dataset):
+        selection["indicator"] = query["indicator"]
+    province = query.get("province")
+    if province is not None and province not in datasets.provinces():
+        province = None
+    return selection, province
+
+
+def page_query():
+    # The renderer fetches the layout from the page with a same-origin
+    # request, so the page URL (and its deep-link query) is the Referer
+    if not flask.has_request_context() or not flask.request.referrer:
+        return {}
+    return dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(flask.request.referrer).query))
+
+
+# Response cache key of the layout for the current request's page; layouts
+# embed the indicator manifest of every dataset, so they are all dropped
+# whenever any data is reloaded
+LAYOUT_CACHE_KEY = "layout"
+
+
+def layout_cache_key():
+    selection, province = page_selection(page_query())
+    return (LAYOUT_CACHE_KEY, selection["dataset"], selection["indicator"], selection["view_mode"], selection["country"], province)
+
+
+# Add dataset dropdown above map + sidebar. The page arrives with the map
+# and sidebar of the selected view already rendered (from the app's figure
+# caches), so no callback runs on load.
+def build_layout(app=None):
+    selection, province = page_selection(page_query())
+    dataset, indicator = selection["dataset"], selection["indicator"]
+    manifest = indicator_manifest()
+    options, _, indicator_style, view_style, sidebar_style = manifest.get(dataset, manifest["__default__"])
+    click = {"points": [{"location": province}]} if province else None
+    map_figure = sidebar_figure = {"data": [], "layout": {}}
+    province_children = None
+    # Dash also calls the layout outside a request, only to validate the ids
+    if app is not None and flask.has_request_context():
+        map_figure = app.update_map(dataset, selection["view_mode"], indicator, selection["country"])
+        sidebar_figure, province_children = app.update_sidebar_chart(dataset, indicator, click)
+        if isinstance(sidebar_figure, type(dash.no_update)):
+            sidebar_figure = {"data": [], "layout": {}}
+    return html.Div([
+        html.H1("Nepal Literacy Map", style={"textAlign": "center"}),
+        dcc.Store(id="indicator-manifest", data=indicator_manifest()),
+        # Which dataset the map currently shows, so indicator flips can be patched
+        dcc.Store(id="map-rendered", data={"dataset": dataset, "indicator": indicator}),
+        # What the sidebar and map show (see the callbacks in create_app)
+        dcc.Store(id="selection", data={"dataset": selection["dataset"], "indicator": selection["indicator"]}),
+        dcc.Store(id="map-selection", data=selection),
+
+        html.Div([
+            html.Label("Select Dataset:", style={"fontWeight": "bold"}),
+            dcc.Dropdown(
+                id="dataset-selector",
+                options=DATASET_OPTIONS,
+                value=dataset,
+                clearable=False,
+                style={"width": "50%", "marginBottom": "20px"}
+            )
+        ], style={"padding": "0 30px"}),
+
+        html.Div(id="country-wrapper", children=[
+            html.Label("Select Country:", style={"fontWeight": "bold"}),
+            dcc.Dropdown(
+                id="country-selector",
+                options=COUNTRY_OPTIONS,
+                value=selection["country"],
+                clearable=False,
+                style={"width": "50%", "marginBottom": "20px"}
+            )
+        ], style={"display": "block" if dataset in COUNTRY_DATASETS else "none", "padding": "0 30px"}),
+
+        html.Div([
+            dcc.Graph(id="map", figure=map_figure, clickData=click, style={"height": "80vh", "width": "70vw"}),
+            html.Div(
+                id="info-box",
+                children=[
+                    html.Div(id="province-data", children=province_children, style={"marginBottom": "20px"}),
+                    html.Div(id="indicator-wrapper", children=[
+                        html.Label("Select Indicator:", style={"fontWeight": "bold"}),
+                        dcc.Dropdown(
+                            id="indicator-selector",
+                            options=options,
+                            value=indicator,
+                            clearable=False,
+                            style={"width": "100%", "marginBottom": "20px"}
+                        ),
+                    ], style=indicator_style),
+
+                    html.Div(id="viewmode-wrapper", children=[
+                        html.Label("Select View Mode (6.3 only):", style={"fontWeight": "bold"}),
+                        dcc.Dropdown(
+                            id="view-selector",
+                            options=VIEW_MODE_OPTIONS,
+                            value=selection["view_mode"],
+                            clearable=False,
+                            style={"width": "100%", "marginBottom": "20px"}
+                        ),
+                    ], style=view_style),
+
+                    html.Div(
+                        id="sidebar-chart-wrapper",
+                        children=[
+                            dcc.Graph(id="sidebar-chart", figure=sidebar_figure)
                         ],
-                        value="split",
-                        clearable=False,
-                        style={"width": "100%", "marginBottom": "20px"}
-                    ),
-                ], style={"display": "none"}),
-
-                html.Div(
-                    id="sidebar-chart-wrapper",
-                    children=[
-                        dcc.Graph(id="sidebar-chart")
-                    ]
-                )
-            ],
-            style={
-                "padding": "20px",
-                "fontSize": "16px",
-                "width": "25vw",
-                "height": "80vh",
-                "overflowY": "auto",
-                "display": "inline-block",
-                "verticalAlign": "top",
-                "borderLeft": "2px solid #ccc",
-                "backgroundColor": "#f9f9f9"
-            }
-        ),
-    ], style={"display": "flex", "justifyContent": "space-between"})
-])
+                        style=sidebar_style
+                    )
+                ],
+                style={
+                    "padding": "20px",
+                    "fontSize": "16px",
+                    "width": "25vw",
+                    "height": "80vh",
+                    "overflowY": "auto",
+                    "display": "inline-block",
+                    "verticalAlign": "top",
+                    "borderLeft": "2px solid #ccc",
+                    "backgroundColor": "#f9f9f9"
+                }
+            ),
+        ], style={"display": "flex", "justifyContent": "space-between"})
+    ])
 
 # Callback for indicator dropdown options, default value, and visibility of dropdown wrappers and sidebar chart
-@app.callback(
-    Output("indicator-selector", "options"),
-    Output("indicator-selector", "value"),
-    Output("indicator-wrapper", "style"),
-    Output("viewmode-wrapper", "style"),
-    Output("sidebar-chart-wrapper", "style"),
-    Input("dataset-selector", "value")
-)
 def update_indicator_dropdown(dataset):
     if dataset == "table_13":
+        df_13 = datasets.get("table_13")
         valid_columns = [col for col in df_13.columns[1:] if col and col != "Category"]
         options = [{"label": col, "value": col} for col in valid_columns if pd.notna(col)]
         if options:
@@ -295,18 +261,21 @@ def update_indicator_dropdown(dataset):
         else:
             return [], None, {"display": "block"}, {"display": "none"}, {"display": "block"}
     elif dataset == "table_14":
+        df_14 = datasets.get("table_14")
         options = [{"label": col, "value": col} for col in df_14.columns[1:] if pd.notna(col)]
         if options:
             return options, options[0]["value"], {"display": "block"}, {"display": "none"}, {"display": "block"}
         else:
             return [], None, {"display": "block"}, {"display": "none"}, {"display": "block"}
     elif dataset == "ner":
+        df_ner = datasets.get("ner")[0]
         indicator_options = [{"label": col, "value": col} for col in df_ner.columns[2:] if pd.notna(col)]
         if indicator_options:
             return indicator_options, indicator_options[0]["value"], {"display": "block"}, {"display": "none"}, {"display": "block"}
         else:
             return [], None, {"display": "block"}, {"display": "none"}, {"display": "block"}
     elif dataset == "ger":
+        df_ger = datasets.get("ger")[0]
         indicator_options = [{"label": col, "value": col} for col in df_ger.columns[2:] if pd.notna(col)]
         if indicator_options:
             return indicator_options, indicator_options[0]["value"], {"display": "block"}, {"display": "none"}, {"display": "block"}
@@ -341,18 +310,14 @@ def update_indicator_dropdown(dataset):
         return [], None, {"display": "none"}, {"display": "none"}, {"display": "block"}
 
 # Dataset switching logic with conditional rendering for bar charts and view modes, and map coloring for 13/14
-@app.callback(
-    Output("map", "figure"),
-    Input("dataset-selector", "value"),
-    Input("view-selector", "value"),
-    Input("indicator-selector", "value")
-)
-def update_map(dataset, view_mode, indicator):
+def update_map(dataset, view_mode, indicator, country="NPL"):
     import plotly.graph_objs as go
     if dataset == "table_6_1":
+        # Province columns are read straight from the numeric store (see datasets.ProvinceMatrix)
+        matrix = datasets.get("table_6_1_matrix")
         return px.choropleth_mapbox(
-            df_clean,
-            geojson=geojson,
+            {"Province": matrix.provinces, **{col: matrix.column(col) for col in matrix.indicators}},
+            geojson=province_geojson_url(),
             locations="Province",
             featureidkey="properties.ADM1_EN",
             color="Total",
@@ -362,15 +327,10 @@ def update_map(dataset, view_mode, indicator):
             center={"lat": 28.3949, "lon": 84.1240},
             opacity=0.7,
             hover_name="Province",
-            hover_data={"Total": True, "Male": True, "Female": True, "Province": False}
+            hover_data={"Total": ":.1f", "Male": ":.1f", "Female": ":.1f", "Province": False}
         )
     elif dataset == "table_6_2":
-        df_6_2_long = df_6_2.melt(id_vars="Age group", value_vars=["Total in urban", "Total in Rural"],
-                                  var_name="Area", value_name="Literacy Rate (%)")
-        df_6_2_long["Area"] = df_6_2_long["Area"].replace({
-            "Total in urban": "Urban",
-            "Total in Rural": "Rural"
-        })
+        df_6_2_long = datasets.get("table_6_2_long")
         fig_6_2 = px.bar(
             df_6_2_long,
             x="Age group",
@@ -382,13 +342,8 @@ def update_map(dataset, view_mode, indicator):
         fig_6_2.update_layout(height=600)
         return fig_6_2
     elif dataset == "table_6_3":
-        df_6_3_fixed = df_6_3.copy()
-        df_6_3_fixed.set_index("Gender/Poverty Status", inplace=True)
-        df_6_3_fixed = df_6_3_fixed.drop(columns=["Total"], errors="ignore").T
-        df_6_3_fixed.reset_index(inplace=True)
-        df_6_3_fixed = df_6_3_fixed.rename(columns={"index": "Age group"})
-
-        df_6_3_long = df_6_3_fixed.melt(id_vars="Age group", var_name="Status", value_name="Literacy Rate (%)")
+        # Reshaped once at load time (see datasets.load_table_6_3_long)
+        df_6_3_long = datasets.get("table_6_3_long")
 
         if view_mode == "combined":
             fig_combined = px.bar(
@@ -403,8 +358,8 @@ def update_map(dataset, view_mode, indicator):
             return fig_combined
         else:
             # Split into poor and non-poor subsets
-            df_poor = df_6_3_long[df_6_3_long["Status"].str.lower().str.contains("poor") & ~df_6_3_long["Status"].str.lower().str.contains("non")]
-            df_nonpoor = df_6_3_long[df_6_3_long["Status"].str.lower().str.contains("non")]
+            df_poor = df_6_3_long[df_6_3_long["poor"]]
+            df_nonpoor = df_6_3_long[df_6_3_long["non_poor"]]
 
             fig_poor = px.bar(
                 df_poor,
@@ -439,19 +394,19 @@ def update_map(dataset, view_mode, indicator):
                 showlegend=True
             )
             return fig_split
-    elif dataset == "table_13" and indicator:
-        if indicator not in df_13.columns:
-            return fig
-        df_13_filtered = df_13.iloc[1:][["Province", indicator]].copy()
-        df_13_filtered[indicator] = pd.to_numeric(df_13_filtered[indicator], errors="coerce")
+    elif dataset == "table_13" and indicator in datasets.get("table_13_matrix"):
+        # Indicators the table doesn't have (e.g. a column renamed by a data
+        # reload) get the empty map below
+        matrix = datasets.get("table_13_matrix")
+        values = matrix.column(indicator)
         fig_13_map = px.choropleth_mapbox(
-            df_13_filtered,
-            geojson=geojson,
+            {"Province": matrix.provinces, indicator: values},
+            geojson=province_geojson_url(),
             locations="Province",
             featureidkey="properties.ADM1_EN",
             color=indicator,
             color_continuous_scale="YlOrBr",
-            range_color=[df_13_filtered[indicator].min(), df_13_filtered[indicator].max()],
+            range_color=[np.nanmin(values), np.nanmax(values)],
             mapbox_style="carto-positron",
             zoom=5.8,
             center={"lat": 28.3949, "lon": 84.1240},
@@ -459,13 +414,11 @@ def update_map(dataset, view_mode, indicator):
             hover_name="Province"
         )
         return fig_13_map
-    elif dataset == "table_14" and indicator:
-        if indicator not in df_14.columns:
-            return fig
-        df_14_filtered = df_14[df_14["Province"] != "Nepal"][["Province", indicator]].copy()
+    elif dataset == "table_14" and indicator in datasets.get("table_14_matrix"):
+        matrix = datasets.get("table_14_matrix")
         fig_14_map = px.choropleth_mapbox(
-            df_14_filtered,
-            geojson=geojson,
+            {"Province": matrix.provinces, indicator: matrix.column(indicator)},
+            geojson=province_geojson_url(),
             locations="Province",
             featureidkey="properties.ADM1_EN",
             color=indicator,
@@ -478,13 +431,10 @@ def update_map(dataset, view_mode, indicator):
         )
         return fig_14_map
     elif dataset == "ner" and indicator:
-        df_plot = ner_provinces[["Region", indicator]].copy()
-        df_plot.rename(columns={"Region": "Province"}, inplace=True)
-        df_plot[indicator] = pd.to_numeric(df_plot[indicator], errors="coerce")
-        df_plot[indicator] = df_plot[indicator] * 100
+        matrix = datasets.get("ner_matrix")
         fig_ner = px.choropleth_mapbox(
-            df_plot,
-            geojson=geojson,
+            {"Province": matrix.provinces, indicator: matrix.column(indicator) * 100},
+            geojson=province_geojson_url(),
             locations="Province",
             featureidkey="properties.ADM1_EN",
             color=indicator,
@@ -497,13 +447,10 @@ def update_map(dataset, view_mode, indicator):
         )
         return fig_ner
     elif dataset == "ger" and indicator:
-        df_plot = ger_provinces[["Region", indicator]].copy()
-        df_plot.rename(columns={"Region": "Province"}, inplace=True)
-        df_plot[indicator] = pd.to_numeric(df_plot[indicator], errors="coerce")
-        df_plot[indicator] = df_plot[indicator] * 100
+        matrix = datasets.get("ger_matrix")
         fig_ger = px.choropleth_mapbox(
-            df_plot,
-            geojson=geojson,
+            {"Province": matrix.provinces, indicator: matrix.column(indicator) * 100},
+            geojson=province_geojson_url(),
             locations="Province",
             featureidkey="properties.ADM1_EN",
             color=indicator,
@@ -516,9 +463,10 @@ def update_map(dataset, view_mode, indicator):
         )
         return fig_ger
     elif dataset == "table_13_weighted":
+        matrix = datasets.get("table_13_weighted_matrix")
         fig_weighted = px.choropleth_mapbox(
-            df_13_weighted,
-            geojson=geojson,
+            {"Province": matrix.provinces, "Normalized Illiteracy Rate (%)": matrix.column("Normalized Illiteracy Rate (%)")},
+            geojson=province_geojson_url(),
             locations="Province",
             featureidkey="properties.ADM1_EN",
             color="Normalized Illiteracy Rate (%)",
@@ -536,10 +484,10 @@ def update_map(dataset, view_mode, indicator):
         )
         return fig_weighted
     elif dataset == "table_13":
-        # fallback if no indicator
+        # fallback if no indicator, or one the table doesn't have
         return px.choropleth_mapbox(
             pd.DataFrame({"Province": [], "value": []}),
-            geojson=geojson,
+            geojson=province_geojson_url(),
             locations="Province",
             featureidkey="properties.ADM1_EN",
             color="value",
@@ -550,7 +498,7 @@ def update_map(dataset, view_mode, indicator):
     elif dataset == "table_14":
         return px.choropleth_mapbox(
             pd.DataFrame({"Province": [], "value": []}),
-            geojson=geojson,
+            geojson=province_geojson_url(),
             locations="Province",
             featureidkey="properties.ADM1_EN",
             color="value",
@@ -559,22 +507,23 @@ def update_map(dataset, view_mode, indicator):
             center={"lat": 28.3949, "lon": 84.1240},
         )
     elif dataset == "oos":
-        df_oos_nepal_plot = df_oos_nepal.copy()
-        if "value" not in df_oos_nepal_plot.columns and "Rate" in df_oos_nepal_plot.columns:
-            df_oos_nepal_plot.rename(columns={"Rate": "value"}, inplace=True)
-        df_oos_nepal_plot["value"] = pd.to_numeric(df_oos_nepal_plot["value"], errors="coerce") * 100
+        country_name = datasets.COUNTRIES.get(country, country)
+        df_oos_plot = datasets.get("oos").slice(country).copy()
+        if "value" not in df_oos_plot.columns and "Rate" in df_oos_plot.columns:
+            df_oos_plot.rename(columns={"Rate": "value"}, inplace=True)
+        df_oos_plot["value"] = df_oos_plot["value"] * 100
 
         if indicator and indicator.startswith("OOS."):
             level_map = {"OOS.1": "Primary", "OOS.2": "Lower Secondary", "OOS.3": "Upper Secondary"}
             selected_level = level_map.get(indicator, "")
-            df_oos_level = df_oos_nepal_plot[df_oos_nepal_plot["Level"] == selected_level].copy()
+            df_oos_level = df_oos_plot[df_oos_plot["Level"] == selected_level].copy()
             fig = px.line(
                 df_oos_level,
                 x="Year",
                 y="value",
                 color="Gender",
                 markers=True,
-                title=f"Out-of-School Rates in Nepal ({selected_level})",
+                title=f"Out-of-School Rates in {country_name} ({selected_level})",
                 labels={"value": "Percentage (%)"}
             )
             fig.update_layout(height=600)
@@ -583,13 +532,13 @@ def update_map(dataset, view_mode, indicator):
 
         elif indicator == "all":
             fig = px.line(
-                df_oos_nepal_plot,
+                df_oos_plot,
                 x="Year",
                 y="value",
                 color="Level",
                 line_dash="Gender",
                 markers=True,
-                title="Out-of-School Rates in Nepal by Gender and Level (All Levels Combined)",
+                title=f"Out-of-School Rates in {country_name} by Gender and Level (All Levels Combined)",
                 labels={"value": "Percentage (%)"}
             )
             fig.update_layout(height=800)
@@ -598,6 +547,11 @@ def update_map(dataset, view_mode, indicator):
     elif dataset == "ger_time" and indicator:
         # Combine GER, NER, and OOS data for the same level if indicator is GER or NER
         if indicator.startswith("NER.") or indicator.startswith("GER."):
+            # Per-country slices of the time series (see datasets.CountryIndex)
+            ger_time_index, ner_time_index = datasets.get("ger_time")
+            df_ger_time = ger_time_index.slice(country)
+            df_ner_time = ner_time_index.slice(country)
+            df_oos = datasets.get("oos").slice(country)
             # Extract level number (e.g., "1", "2", "3")
             level = indicator.split(".")[1]
             ger_subset = df_ger_time[df_ger_time["indicator"] == f"GER.{level}"].copy()
@@ -610,15 +564,14 @@ def update_map(dataset, view_mode, indicator):
             # Robust lowercase matching for OOS levels
             level_map = {"1": "Primary", "2": "Lower Secondary", "3": "Upper Secondary"}
             oos_level_name = level_map.get(level, "").lower()
-            oos_subset = df_oos_nepal[df_oos_nepal["Level"].str.lower() == oos_level_name].copy()
+            oos_subset = df_oos[df_oos["Level"].str.lower() == oos_level_name].copy()
             # Add conversion to percent for OOS data
-            oos_subset["value"] = pd.to_numeric(oos_subset["value"], errors="coerce") * 100
+            oos_subset["value"] = oos_subset["value"] * 100
             if not oos_subset.empty:
                 oos_subset["Type"] = "OOS"
                 oos_subset["indicator"] = f"OOS.{level}"
                 oos_subset.rename(columns={"Rate": "value"}, inplace=True)
                 df_combined = pd.concat([df_combined, oos_subset], ignore_index=True)
-            df_combined["value"] = pd.to_numeric(df_combined["value"], errors="coerce")
             fig = px.line(
                 df_combined,
                 x="Year",
@@ -626,7 +579,7 @@ def update_map(dataset, view_mode, indicator):
                 color="Gender",
                 line_dash="Type",
                 markers=True,
-                title=f"GER vs NER vs OOS Time Series: Level {level}",
+                title=f"GER vs NER vs OOS Time Series: Level {level}, {datasets.COUNTRIES.get(country, country)}",
                 labels={"value": "Percentage (%)", "Type": "Indicator Type"}
             )
             fig.update_layout(height=600)
@@ -636,7 +589,7 @@ def update_map(dataset, view_mode, indicator):
     else:
         empty_fig = px.choropleth_mapbox(
             pd.DataFrame({"Province": [], "value": []}),
-            geojson=geojson,
+            geojson=province_geojson_url(),
             locations="Province",
             featureidkey="properties.ADM1_EN",
             color="value",
@@ -647,14 +600,56 @@ def update_map(dataset, view_mode, indicator):
         return empty_fig
 
 
+# Sidebar outputs of the click-through views for every province, built once
+# with their data (and rebuilt with it on a reload), so a map click is a
+# dict lookup by province name
+@datasets.register("table_6_1_sidebar", sources=datasets.sources("table_6_1"))
+def build_table_6_1_sidebar():
+    source_text = html.P("Source: Nepal Living Standard IV 2022/2023", style={"fontSize": "12px", "fontStyle": "italic", "marginTop": "10px"})
+    details = {}
+    for province, row in datasets.get("table_6_1").groupby("Province", sort=False):
+        values = row.iloc[0]
+        fig = px.bar(
+            row,
+            x="Province",
+            y=["Male", "Female", "Total"],
+            barmode="group",
+            title=f"Literacy Rates for {province}",
+            labels={"value": "Literacy Rate (%)", "variable": "Gender"},
+        )
+        fig.update_layout(height=350)
+        content = html.Div([
+            source_text,
+            html.H4(f"{province}"),
+            html.P(f"Male Literacy Rate: {values['Male']}%"),
+            html.P(f"Female Literacy Rate: {values['Female']}%"),
+            html.P(f"Total Literacy Rate: {values['Total']}%"),
+        ])
+        details[province] = (serialize(fig), content)
+    return details
+
+
+@datasets.register("table_13_weighted_sidebar", sources=datasets.sources("table_13_weighted_matrix"))
+def build_table_13_weighted_sidebar():
+    import plotly.graph_objs as go
+    source_text = html.P("Source: Nepal Population and Housing Census 2021", style={"fontSize": "12px", "fontStyle": "italic", "marginTop": "10px"})
+    blank = serialize(go.Figure(layout={"xaxis": {"visible": False}, "yaxis": {"visible": False}}))
+    matrix = datasets.get("table_13_weighted_matrix")
+    details = {}
+    for province, value in zip(matrix.provinces, matrix.column("Normalized Illiteracy Rate (%)")):
+        if pd.isna(value):
+            continue
+        content = html.Div([
+            source_text,
+            html.H4(f"{province}"),
+            html.P(f"Normalized Illiteracy Rate: {value:.2f}%"),
+            html.P("This value represents the percentage of the provincial population (aged 5 and above) who cannot read or write. It is calculated by dividing the illiterate population by the total population in that age group, providing a clearer picture of educational challenges normalized for population size.")
+        ])
+        details[province] = (blank, content)
+    return details
+
+
 # Callback for sidebar chart (Table 13 & 14) and info
-@app.callback(
-    Output("sidebar-chart", "figure"),
-    Output("province-data", "children"),
-    Input("dataset-selector", "value"),
-    Input("indicator-selector", "value"),
-    Input("map", "clickData")
-)
 def update_sidebar_chart(dataset, indicator, clickData):
     import plotly.graph_objs as go
     # Determine source text to prepend
@@ -672,26 +667,17 @@ def update_sidebar_chart(dataset, indicator, clickData):
         ])
 
     if dataset == "table_13_weighted":
-        if clickData and "points" in clickData:
-            province = clickData["points"][0].get("location")
-            row = df_13_weighted[df_13_weighted["Province"] == province]
-            if not row.empty:
-                value = row.iloc[0]["Normalized Illiteracy Rate (%)"]
-                content = html.Div([
-                    source_text,
-                    html.H4(f"{province}"),
-                    html.P(f"Normalized Illiteracy Rate: {value:.2f}%"),
-                    html.P("This value represents the percentage of the provincial population (aged 5 and above) who cannot read or write. It is calculated by dividing the illiterate population by the total population in that age group, providing a clearer picture of educational challenges normalized for population size.")
-                ])
-                return go.Figure(layout={"xaxis": {"visible": False}, "yaxis": {"visible": False}}), content
+        details = datasets.get("table_13_weighted_sidebar").get(clicked_province(clickData))
+        if details is not None:
+            return details
         return go.Figure(layout={"xaxis": {"visible": False}, "yaxis": {"visible": False}}), html.Div([
             source_text,
             html.P("Click on a province to see its normalized illiteracy rate.")
         ])
-    elif dataset == "table_14" and indicator and indicator in df_14.columns:
-        df_14_clean = df_14[df_14["Province"] != "Nepal"]
+    elif dataset == "table_14" and indicator and indicator in datasets.get("table_14_matrix"):
+        matrix = datasets.get("table_14_matrix")
         fig = px.bar(
-            df_14_clean,
+            {"Province": matrix.provinces, indicator: matrix.column(indicator)},
             x="Province",
             y=indicator,
             title=f"Table 14: {indicator} by Province"
@@ -700,10 +686,9 @@ def update_sidebar_chart(dataset, indicator, clickData):
         return fig, [source_text]
     elif dataset == "ner" and indicator:
         # Placeholder: show all provinces for indicator as bar (expand in next patch for other categories)
-        df_plot = ner_provinces[["Region", indicator]].copy()
-        df_plot[indicator] = pd.to_numeric(df_plot[indicator], errors="coerce")
+        matrix = datasets.get("ner_matrix")
         fig = px.bar(
-            df_plot,
+            {"Region": matrix.provinces, indicator: matrix.column(indicator)},
             x="Region",
             y=indicator,
             title=f"NER: {indicator} by Province"
@@ -714,10 +699,9 @@ def update_sidebar_chart(dataset, indicator, clickData):
         ])
     elif dataset == "ger" and indicator:
         # Placeholder: show all provinces for indicator as bar (expand in next patch for other categories)
-        df_plot = ger_provinces[["Region", indicator]].copy()
-        df_plot[indicator] = pd.to_numeric(df_plot[indicator], errors="coerce")
+        matrix = datasets.get("ger_matrix")
         fig = px.bar(
-            df_plot,
+            {"Region": matrix.provinces, indicator: matrix.column(indicator)},
             x="Region",
             y=indicator,
             title=f"GER: {indicator} by Province"
@@ -743,11 +727,10 @@ def update_sidebar_chart(dataset, indicator, clickData):
             html.P("GER and NER Source: UNESCO OPRI Database", style={"fontSize": "12px", "fontStyle": "italic", "marginTop": "10px"}),
             html.P("OOS Source: UNESCO Institute for Statistics Database (UIS)", style={"fontSize": "12px", "fontStyle": "italic", "marginTop": "10px"})
         ])
-    elif dataset == "table_13" and indicator and indicator in df_13.columns:
-        df_13_filtered = df_13.iloc[1:].copy()
-        df_13_filtered[indicator] = pd.to_numeric(df_13_filtered[indicator], errors="coerce")
+    elif dataset == "table_13" and indicator and indicator in datasets.get("table_13_matrix"):
+        matrix = datasets.get("table_13_matrix")
         fig = px.bar(
-            df_13_filtered,
+            {"Province": matrix.provinces, indicator: matrix.column(indicator)},
             x="Province",
             y=indicator,
             title=f"Table 13: {indicator} by Province"
@@ -755,31 +738,11 @@ def update_sidebar_chart(dataset, indicator, clickData):
         fig.update_layout(height=350)
         return fig, [source_text]
     if dataset == "table_6_1":
-        if clickData and "points" in clickData:
-            province = clickData["points"][0].get("location")
-            row = df_clean[df_clean["Province"] == province]
-            if not row.empty:
-                row = row.copy()
-                row[["Male", "Female", "Total"]] = row[["Male", "Female", "Total"]].apply(pd.to_numeric, errors="coerce")
-                values = row.iloc[0]
-                fig = px.bar(
-                    row,
-                    x="Province",
-                    y=["Male", "Female", "Total"],
-                    barmode="group",
-                    title=f"Literacy Rates for {province}",
-                    labels={"value": "Literacy Rate (%)", "variable": "Gender"},
-                )
-                fig.update_layout(height=350)
-                content = html.Div([
-                    source_text,
-                    html.H4(f"{province}"),
-                    html.P(f"Male Literacy Rate: {values['Male']}%"),
-                    html.P(f"Female Literacy Rate: {values['Female']}%"),
-                    html.P(f"Total Literacy Rate: {values['Total']}%"),
-                ])
-                return fig, content
+        details = datasets.get("table_6_1_sidebar").get(clicked_province(clickData))
+        if details is not None:
+            return details
 
+        df_clean = datasets.get("table_6_1")
         # Default view: all provinces
         fig = px.bar(
             df_clean,
@@ -795,7 +758,262 @@ def update_sidebar_chart(dataset, indicator, clickData):
     # Return empty figure and None for other datasets or no clickData
     return go.Figure(), None
 
-import os
+
+# Datasets whose indicators share one choropleth layout, so switching
+# indicator only changes the province values and color range
+PATCHABLE_DATASETS = ["table_13", "table_14", "ner", "ger"]
+
+
+def map_patch(figure):
+    # Partial update turning the current choropleth of a PATCHABLE_DATASETS
+    # dataset into `figure` (another indicator of the same dataset)
+    trace = figure["data"][0]
+    coloraxis = figure["layout"]["coloraxis"]
+    patch = Patch()
+    patch["data"][0]["z"] = trace["z"]
+    patch["data"][0]["hovertemplate"] = trace["hovertemplate"]
+    patch["layout"]["coloraxis"]["cmin"] = coloraxis.get("cmin")
+    patch["layout"]["coloraxis"]["cmax"] = coloraxis.get("cmax")
+    patch["layout"]["coloraxis"]["colorbar"]["title"]["text"] = coloraxis["colorbar"]["title"]["text"]
+    return patch
+
+
+def reachable_inputs():
+    # Every (dataset, view mode, indicator) the dropdowns can produce, plus
+    # the per-province clicks of the click-through sidebar views
+    click_provinces = {
+        "table_6_1": list(datasets.get("table_6_1")["Province"]),
+        "table_13_weighted": list(datasets.get("table_13_weighted")["Province"]),
+    }
+    map_inputs, sidebar_inputs = [], []
+    for dataset in [o["value"] for o in DATASET_OPTIONS]:
+        options = update_indicator_dropdown(dataset)[0]
+        # None is what the callbacks see before the indicator dropdown is filled
+        indicators = [None] + [o["value"] for o in options]
+        countries = [o["value"] for o in COUNTRY_OPTIONS] if dataset in COUNTRY_DATASETS else ["NPL"]
+        for indicator in indicators:
+            for view_mode in [o["value"] for o in VIEW_MODE_OPTIONS]:
+                for country in countries:
+                    map_inputs.append((dataset, view_mode, indicator, country))
+            sidebar_inputs.append((dataset, indicator, None))
+            for province in click_provinces.get(dataset, []):
+                sidebar_inputs.append((dataset, indicator, {"points": [{"location": province}]}))
+    return map_inputs, sidebar_inputs
+
+
+def warm_caches(app):
+    # Fill the app's figure caches with every reachable output
+    map_inputs, sidebar_inputs = reachable_inputs()
+    for args in map_inputs:
+        app.update_map(*args)
+    for args in sidebar_inputs:
+        app.update_sidebar_chart(*args)
+    # Warm-up lookups shouldn't show up in the cache metrics
+    app.map_cache.reset_stats()
+    app.sidebar_cache.reset_stats()
+    return len(map_inputs) + len(sidebar_inputs)
+
+
+# Registry entries behind each dataset's figures, so a data reload only
+# drops the figures built from what changed. Every dataset also depends on
+# "geojson" (the maps embed its versioned URL).
+DATASET_ENTRIES = {
+    "table_6_1": ["table_6_1", "table_6_1_matrix", "table_6_1_sidebar"],
+    "table_6_2": ["table_6_2", "table_6_2_long"],
+    "table_6_3": ["table_6_3", "table_6_3_long"],
+    "table_13": ["table_13", "table_13_matrix"],
+    "table_13_weighted": ["table_13_weighted", "table_13_weighted_matrix", "table_13_weighted_sidebar"],
+    "table_14": ["table_14", "table_14_matrix"],
+    "ner": ["ner", "ner_matrix"],
+    "ger": ["ger", "ger_matrix"],
+    "oos": ["oos"],
+    "ger_time": ["ger_time", "oos"],
+}
+
+
+def on_data_reload(app, names):
+    # Called by the data watcher after it swapped in new registry entries
+    global _indicator_manifest
+    _indicator_manifest = None
+    if app.response_cache is not None:
+        app.response_cache.invalidate(LAYOUT_CACHE_KEY)
+    for dataset, entries in DATASET_ENTRIES.items():
+        if "geojson" in names or set(entries) & set(names):
+            invalidate_figure_caches(app, dataset)
+
+
+def invalidate_figure_caches(app, dataset=None):
+    app.map_cache.invalidate(dataset)
+    app.sidebar_cache.invalidate(dataset)
+    if app.response_cache is not None:
+        app.response_cache.invalidate(dataset)
+
+
+def create_app(config=None):
+    config = config or load_config()
+
+    # Create Dash app
+    with profiling.span("create app"):
+        # The layout already holds every output for the page's selection
+        app = dash.Dash(__name__, serve_locally=config["serve_locally"], prevent_initial_callbacks=True)
+    app.title = "Nepal Literacy Rates"
+    app.literacy_config = config
+
+    # orjson for figures and responses when installed (see serialization.py)
+    serialization.configure(config["json_engine"])
+
+    # Cleaned frames come from memory-mapped Arrow files that every worker
+    # shares, written once when missing or stale (see shared_data.py).
+    # Attached before anything (e.g. the layout check) loads a dataset.
+    if config["shared_data"]:
+        shared_data.attach(config["shared_data_dir"])
+
+    # Callback outputs only depend on their inputs and the static datasets,
+    # so they are memoized per input tuple (see figure_cache.py).
+    app.map_cache = FigureCache("map", maxsize=config["figure_cache_size"])
+    app.sidebar_cache = FigureCache("sidebar", maxsize=config["figure_cache_size"])
+    app.update_map = app.map_cache.memoize(key=map_cache_key)(update_map)
+    app.update_sidebar_chart = app.sidebar_cache.memoize(key=sidebar_cache_key)(update_sidebar_chart)
+
+    # Prerendered outputs from prerender.py are loaded lazily on a cache miss,
+    # as long as they were built from the current data files and code.
+    figure_store = FigureStore(config["figure_store_dir"])
+    if figure_store.is_current(data_fingerprint(), code_fingerprint()):
+        app.map_cache.store = figure_store
+        app.sidebar_cache.store = figure_store
+
+    # Prometheus-style /metrics for callback latency, payload size, cache hits
+    # and the memory each loaded dataset takes
+    app.metrics = metrics.init_app(
+        app, metrics.Metrics(
+            config["metrics_dir"], caches=[app.map_cache, app.sidebar_cache], memory_report=datasets.memory_report
+        )
+    )
+
+    # Gzip/Brotli for callback responses and static files; callback bodies
+    # and each deep link's layout are compressed once and kept
+    # precompressed (see compression.py).
+    # Installed after the metrics hooks, so precompressed responses are
+    # still timed and Flask's reversed after_request order has the metrics
+    # count the compressed bytes.
+    app.response_cache = None
+    if config["compress"]:
+        app.response_cache = compression.init_app(
+            app, maxsize=config["figure_cache_size"], static_paths=[GEOJSON_PATH], layout_key=layout_cache_key
+        )
+        app.metrics.caches.append(app.response_cache)
+
+    app.server.add_url_rule(GEOJSON_PATH, "province_geojson", serve_province_geojson)
+
+    # Every request reads one consistent set of datasets, even if the data
+    # watcher swaps in reloaded ones meanwhile
+    @app.server.before_request
+    def _pin_datasets():
+        flask.g.datasets_token = datasets.pin()
+        if app.data_watcher is not None:
+            app.data_watcher.ensure_running()
+
+    @app.server.teardown_request
+    def _unpin_datasets(exc):
+        token = flask.g.pop("datasets_token", None)
+        if token is not None:
+            datasets.unpin(token)
+
+    # Rebuild datasets whose files in data/ change, without a restart (see hot_reload.py)
+    app.data_watcher = None
+    if config["reload_data"]:
+        app.data_watcher = DataWatcher(
+            on_reload=lambda names: on_data_reload(app, names), interval=config["reload_interval"]
+        )
+
+    # Evaluated per page load, so the manifest is only built on first visit
+    # and every page is rendered for its own deep link
+    app.layout = lambda: build_layout(app)
+
+    # Dropdown changes are folded into two stores, the only inputs of the
+    # server callbacks: "selection" (dataset and its resolved indicator) for
+    # the sidebar, and "map-selection" (plus view mode and country) for the
+    # map. A new dataset resets the indicator dropdown and the wrappers'
+    # visibility from the manifest in the browser, in the same step that
+    # writes "selection", so one change renders the map and sidebar once
+    # each instead of once with the stale indicator and again with the new.
+    app.clientside_callback(
+        """
+        function(dataset, indicator, manifest) {
+            const changed = dash_clientside.callback_context.triggered.map((t) => t.prop_id);
+            if (changed.length > 0 && !changed.includes("dataset-selector.value")) {
+                const noUpdate = dash_clientside.no_update;
+                return [noUpdate, noUpdate, noUpdate, noUpdate, noUpdate, noUpdate, {"dataset": dataset, "indicator": indicator}];
+            }
+            const dropdown = manifest[dataset] || manifest["__default__"];
+            const countryStyle = {"display": ["oos", "ger_time"].includes(dataset) ? "block" : "none", "padding": "0 30px"};
+            return dropdown.concat([countryStyle, {"dataset": dataset, "indicator": dropdown[1]}]);
+        }
+        """,
+        Output("indicator-selector", "options"),
+        Output("indicator-selector", "value"),
+        Output("indicator-wrapper", "style"),
+        Output("viewmode-wrapper", "style"),
+        Output("sidebar-chart-wrapper", "style"),
+        Output("country-wrapper", "style"),
+        Output("selection", "data"),
+        Input("dataset-selector", "value"),
+        Input("indicator-selector", "value"),
+        State("indicator-manifest", "data")
+    )
+
+    app.clientside_callback(
+        """
+        function(selection, viewMode, country) {
+            return Object.assign({"view_mode": viewMode, "country": country}, selection);
+        }
+        """,
+        Output("map-selection", "data"),
+        Input("selection", "data"),
+        Input("view-selector", "value"),
+        Input("country-selector", "value")
+    )
+
+    def render_map(selection, rendered):
+        dataset, indicator = selection["dataset"], selection["indicator"]
+        figure = app.update_map(dataset, selection["view_mode"], indicator, selection["country"])
+        shown = {"dataset": dataset, "indicator": indicator}
+        # Same choropleth, new indicator: only send the values that changed
+        if (
+            rendered and rendered.get("dataset") == dataset and rendered.get("indicator") != indicator
+            and dataset in PATCHABLE_DATASETS and indicator in indicator_manifest_values(dataset)
+        ):
+            return map_patch(figure), shown
+        return figure, shown
+
+    app.render_map = render_map
+    app.callback(
+        Output("map", "figure"),
+        Output("map-rendered", "data"),
+        Input("map-selection", "data"),
+        State("map-rendered", "data")
+    )(render_map)
+
+    def render_sidebar(selection, clickData):
+        return app.update_sidebar_chart(selection["dataset"], selection["indicator"], clickData)
+
+    app.render_sidebar = render_sidebar
+    app.callback(
+        Output("sidebar-chart", "figure"),
+        Output("province-data", "children"),
+        Input("selection", "data"),
+        Input("map", "clickData")
+    )(render_sidebar)
+
+    if config["preload_data"]:
+        datasets.load_all()
+    if config["preload_figures"]:
+        warm_caches(app)
+    return app
+
 
 if __name__ == "__main__":
-    app.run(debug=True, host="0.0.0.0", port=int(os.environ.get("PORT", 10000)))
+    # APP_PROFILE=local (or literacy-local.py) for the debug dev server
+    config = load_config()
+    app = create_app(config)
+    app.run(debug=config["debug"], host=config["host"], port=config["port"])
@@ -0,0 +1,209 @@
+import json
+import os
+import threading
+import time
+
+import flask
+
+# Per-callback latency / payload metrics, exposed in the Prometheus text
+# format on /metrics. Every Dash callback request is timed at the Flask
+# level (so the numbers include Dash's JSON encoding) and labelled with the
+# callback name and the selected dataset.
+#
+# With several worker processes, set METRICS_DIR to a directory shared by
+# the workers: each process periodically dumps its counters there as
+# <pid>.json and a scrape sums every file. The files of exited workers
+# stay, so their counts still add up; retire() drops what only describes a
+# live process (see gunicorn.conf.py).
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+FLUSH_INTERVAL = 1.0
+# Snapshot sections that are gauges of the process, not counters
+GAUGE_SECTIONS = ("memory",)
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+class Metrics:
+    def __init__(self, directory=None, caches=(), memory_report=None):
+        self.directory = directory
+        self.caches = list(caches)
+        # Optional callable -> {dataset: bytes held in this process}
+        self.memory_report = memory_report
+        # "callback|dataset" -> [bucket counts..., +Inf count, sum seconds]
+        self.latency = {}
+        # "callback|dataset" -> [total bytes, responses]
+        self.payload = {}
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def observe(self, callback, dataset, seconds, nbytes):
+        key = f"{callback}|{dataset}"
+        with self._lock:
+            hist = self.latency.setdefault(key, [0] * (len(LATENCY_BUCKETS) + 1) + [0.0])
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    hist[i] += 1
+            hist[len(LATENCY_BUCKETS)] += 1
+            hist[-1] += seconds
+            size = self.payload.setdefault(key, [0, 0])
+            size[0] += nbytes
+            size[1] += 1
+        if self.directory and time.monotonic() - self._last_flush > FLUSH_INTERVAL:
+            self.flush()
+
+    def snapshot(self):
+        cache = {}
+        for c in self.caches:
+            for dataset in set(c.hits_by_dataset) | set(c.misses_by_dataset):
+                cache[f"{c.name}|{dataset}"] = [c.hits_by_dataset[dataset], c.misses_by_dataset[dataset]]
+        memory = {}
+        if self.memory_report is not None:
+            memory = {dataset: [nbytes] for dataset, nbytes in self.memory_report().items()}
+        with self._lock:
+            return {
+                "latency": {k: list(v) for k, v in self.latency.items()},
+                "payload": {k: list(v) for k, v in self.payload.items()},
+                "cache": cache,
+                "memory": memory,
+            }
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        path = os.path.join(self.directory, f"{os.getpid()}.json")
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp, path)
+
+    def collect(self):
+        if not self.directory:
+            return self.snapshot()
+        self.flush()
+        merged = {"latency": {}, "payload": {}, "cache": {}, "memory": {}}
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, name), "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for section, values in data.items():
+                for key, counts in values.items():
+                    total = merged[section].setdefault(key, [0] * len(counts))
+                    for i, n in enumerate(counts):
+                        total[i] += n
+        return merged
+
+    def render(self):
+        data = self.collect()
+        lines = [
+            "# HELP literacy_callback_latency_seconds Dash callback request latency, including JSON encoding.",
+            "# TYPE literacy_callback_latency_seconds histogram",
+        ]
+        for key, hist in sorted(data["latency"].items()):
+            callback, dataset = key.split("|", 1)
+            labels = f'callback="{_label(callback)}",dataset="{_label(dataset)}"'
+            for bound, count in zip(LATENCY_BUCKETS, hist):
+                lines.append(f'literacy_callback_latency_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'literacy_callback_latency_seconds_bucket{{{labels},le="+Inf"}} {hist[len(LATENCY_BUCKETS)]}')
+            lines.append(f"literacy_callback_latency_seconds_sum{{{labels}}} {hist[-1]}")
+            lines.append(f"literacy_callback_latency_seconds_count{{{labels}}} {hist[len(LATENCY_BUCKETS)]}")
+
+        lines += [
+            "# HELP literacy_callback_response_bytes Size of Dash callback responses.",
+            "# TYPE literacy_callback_response_bytes summary",
+        ]
+        for key, (total, count) in sorted(data["payload"].items()):
+            callback, dataset = key.split("|", 1)
+            labels = f'callback="{_label(callback)}",dataset="{_label(dataset)}"'
+            lines.append(f"literacy_callback_response_bytes_sum{{{labels}}} {total}")
+            lines.append(f"literacy_callback_response_bytes_count{{{labels}}} {count}")
+
+        lines += [
+            "# HELP literacy_figure_cache_requests_total Figure cache lookups by result.",
+            "# TYPE literacy_figure_cache_requests_total counter",
+        ]
+        ratios = []
+        for key, (hits, misses) in sorted(data["cache"].items()):
+            cache, dataset = key.split("|", 1)
+            labels = f'cache="{_label(cache)}",dataset="{_label(dataset)}"'
+            lines.append(f'literacy_figure_cache_requests_total{{{labels},result="hit"}} {hits}')
+            lines.append(f'literacy_figure_cache_requests_total{{{labels},result="miss"}} {misses}')
+            if hits + misses:
+                ratios.append(f"literacy_figure_cache_hit_ratio{{{labels}}} {hits / (hits + misses)}")
+        lines += [
+            "# HELP literacy_figure_cache_hit_ratio Share of figure cache lookups served from the cache.",
+            "# TYPE literacy_figure_cache_hit_ratio gauge",
+        ] + ratios
+
+        lines += [
+            "# HELP literacy_dataset_memory_bytes Deep memory of each loaded dataset, summed over live worker processes.",
+            "# TYPE literacy_dataset_memory_bytes gauge",
+        ]
+        for dataset, (nbytes,) in sorted(data.get("memory", {}).items()):
+            lines.append(f'literacy_dataset_memory_bytes{{dataset="{_label(dataset)}"}} {nbytes}')
+        return "\n".join(lines) + "\n"
+
+
+def retire(directory, pid):
+    # Called once the process pid has exited: its counters keep counting
+    # toward the totals, its gauges no longer apply
+    path = os.path.join(directory, f"{pid}.json")
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return
+    for section in GAUGE_SECTIONS:
+        data.pop(section, None)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def callback_dataset(body):
+    # The dataset a callback request renders, from the selection store the
+    # map and sidebar callbacks take as input
+    for item in body.get("inputs", []) + body.get("state", []):
+        if isinstance(item, dict) and item.get("id") in ("selection", "map-selection"):
+            return (item.get("value") or {}).get("dataset") or ""
+    return ""
+
+
+def _callback_labels(app, body):
+    callback = body.get("output", "")
+    entry = app.callback_map.get(callback)
+    if entry and entry.get("callback") is not None:
+        callback = entry["callback"].__name__
+    return callback, callback_dataset(body)
+
+
+def init_app(app, metrics, path="/metrics"):
+    server = app.server
+
+    @server.before_request
+    def _start_timer():
+        flask.g.metrics_start = time.perf_counter()
+
+    @server.after_request
+    def _record_callback(response):
+        start = getattr(flask.g, "metrics_start", None)
+        if start is not None and flask.request.path.endswith("_dash-update-component"):
+            body = flask.request.get_json(silent=True) or {}
+            callback, dataset = _callback_labels(app, body)
+            nbytes = response.calculate_content_length() or 0
+            metrics.observe(callback, dataset, time.perf_counter() - start, nbytes)
+        return response
+
+    @server.route(path)
+    def _metrics():
+        return flask.Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+    return metrics
@@ -0,0 +1,51 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Prerender every reachable map and sidebar output into the figure store,
+# so the app only has to read a file on the first hit of each view.
+#   python prerender.py [--workers N] [--out build/figures]
+
+os.chdir(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.getcwd())
+
+import literacy
+from config import load_config
+from figure_cache import serialize
+from figure_store import FigureStore, code_fingerprint, data_fingerprint
+
+
+def init_worker():
+    # The callbacks build URLs through dash.get_relative_path, which needs an app
+    literacy.create_app(load_config("local"))
+
+
+def render(job):
+    cache_name, args, directory = job
+    callback = literacy.update_map if cache_name == "map" else literacy.update_sidebar_chart
+    key = literacy.sidebar_cache_key(*args) if cache_name == "sidebar" else literacy.map_cache_key(*args)
+    value = serialize(callback(*args))
+    return FigureStore(directory).save(cache_name, key, value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prerender dashboard figures")
+    parser.add_argument("--out", default=os.environ.get("FIGURE_STORE_DIR", "build/figures"))
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    init_worker()
+    map_jobs, sidebar_jobs = literacy.reachable_inputs()
+    jobs = [("map", a, args.out) for a in map_jobs] + [("sidebar", a, args.out) for a in sidebar_jobs]
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker) as pool:
+        written = sum(pool.map(render, jobs, chunksize=8))
+    FigureStore(args.out).write_manifest(data_fingerprint(), code_fingerprint(), written)
+    print(f"prerendered {written} of {len(jobs)} outputs into {args.out} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
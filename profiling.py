@@ -0,0 +1,127 @@
+import atexit
+import contextlib
+import json
+import os
+import threading
+import time
+
+# Opt-in startup instrumentation. With LITERACY_PROFILE=1 (or after calling
+# enable()), every span() records its wall time and the process RSS / peak
+# RSS when it finished. report() returns them as a JSON-able dict and
+# write_chrome_trace() writes a file chrome://tracing / Perfetto can open.
+# LITERACY_PROFILE_OUT / LITERACY_PROFILE_TRACE write both at process exit.
+
+_enabled = os.environ.get("LITERACY_PROFILE", "") not in ("", "0")
+_spans = []
+_lock = threading.Lock()
+_origin = time.perf_counter()
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def enabled():
+    return _enabled
+
+
+def reset():
+    global _origin
+    with _lock:
+        _spans.clear()
+    _origin = time.perf_counter()
+
+
+def _rss_kb():
+    # Current and peak resident set size from /proc; None where unavailable
+    try:
+        with open("/proc/self/status", "r", encoding="ascii") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+        return int(fields["VmRSS"].split()[0]), int(fields["VmHWM"].split()[0])
+    except (OSError, KeyError, ValueError):
+        try:
+            import resource
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return None, peak
+        except ImportError:
+            return None, None
+
+
+@contextlib.contextmanager
+def span(name, **args):
+    if not _enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        end = time.perf_counter()
+        rss, peak = _rss_kb()
+        with _lock:
+            _spans.append({
+                "name": name,
+                "start_ms": (start - _origin) * 1000,
+                "duration_ms": (end - start) * 1000,
+                "rss_kb": rss,
+                "peak_rss_kb": peak,
+                "thread": threading.get_ident(),
+                "args": args,
+            })
+
+
+def report():
+    with _lock:
+        spans = sorted(_spans, key=lambda s: s["start_ms"])
+    rss, peak = _rss_kb()
+    return {"pid": os.getpid(), "rss_kb": rss, "peak_rss_kb": peak, "spans": spans}
+
+
+def durations():
+    # Total milliseconds per span name, handy for asserting budgets
+    totals = {}
+    for s in report()["spans"]:
+        totals[s["name"]] = totals.get(s["name"], 0.0) + s["duration_ms"]
+    return totals
+
+
+def write_report(path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report(), f, indent=2)
+
+
+def write_chrome_trace(path):
+    data = report()
+    events = []
+    for s in data["spans"]:
+        events.append({
+            "name": s["name"],
+            "ph": "X",
+            "ts": s["start_ms"] * 1000,
+            "dur": s["duration_ms"] * 1000,
+            "pid": data["pid"],
+            "tid": s["thread"],
+            "args": dict(s["args"], rss_kb=s["rss_kb"], peak_rss_kb=s["peak_rss_kb"]),
+        })
+        if s["rss_kb"] is not None:
+            events.append({
+                "name": "rss_kb",
+                "ph": "C",
+                "ts": (s["start_ms"] + s["duration_ms"]) * 1000,
+                "pid": data["pid"],
+                "args": {"rss_kb": s["rss_kb"]},
+            })
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+def _write_at_exit():
+    if os.environ.get("LITERACY_PROFILE_OUT"):
+        write_report(os.environ["LITERACY_PROFILE_OUT"])
+    if os.environ.get("LITERACY_PROFILE_TRACE"):
+        write_chrome_trace(os.environ["LITERACY_PROFILE_TRACE"])
+
+
+if _enabled:
+    atexit.register(_write_at_exit)
@@ -0,0 +1,79 @@
+import json
+
+import plotly.io.json
+import plotly.utils
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# JSON encoding of figures and Dash responses. Plotly's own path walks
+# every figure in Python twice: to_dict() base64-packs each NumPy array
+# element by element, then to_json_plotly cleans the whole value again
+# before handing it to the engine. With orjson installed both are skipped:
+# figures are encoded straight from their traces' props (NumPy arrays
+# natively, no Python floats in between) and Dash's responses go to orjson
+# as they are. Without orjson, or with the "plotly" engine, plotly's
+# encoder is used unchanged.
+
+ENGINES = ("auto", "orjson", "plotly")
+_ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+_stock_to_json_plotly = plotly.io.json.to_json_plotly
+_plotly_encoder = plotly.utils.PlotlyJSONEncoder()
+_engine = "plotly"
+
+
+def _default(obj):
+    # What orjson can't encode itself: Dash components and patches,
+    # figures, and the pandas/datetime/non-contiguous NumPy values the
+    # PlotlyJSONEncoder converts
+    if hasattr(obj, "to_plotly_json"):
+        return obj.to_plotly_json()
+    return _plotly_encoder.default(obj)
+
+
+def engine():
+    return _engine
+
+
+def dumps(value):
+    if _engine == "orjson":
+        return orjson.dumps(value, default=_default, option=_ORJSON_OPTIONS)
+    return _stock_to_json_plotly(value).encode("utf-8")
+
+
+def loads(data):
+    return orjson.loads(data) if _engine == "orjson" else json.loads(data)
+
+
+def figure_dict(fig):
+    # The figure as plain JSON types
+    if _engine != "orjson":
+        return json.loads(fig.to_json())
+    value = {"data": [trace.to_plotly_json() for trace in fig.data], "layout": fig.layout.to_plotly_json()}
+    if fig.frames:
+        value["frames"] = [frame.to_plotly_json() for frame in fig.frames]
+    return loads(dumps(value))
+
+
+def to_json_plotly(plotly_object, pretty=False, engine=None):
+    # Stand-in for plotly.io.json.to_json_plotly; explicit arguments still
+    # get plotly's own encoder
+    if pretty or engine is not None or _engine != "orjson":
+        return _stock_to_json_plotly(plotly_object, pretty=pretty, engine=engine)
+    return dumps(plotly_object).decode("utf-8")
+
+
+def configure(name="auto"):
+    # "auto" uses orjson when it is installed; returns the engine in use
+    global _engine
+    if name not in ENGINES:
+        raise ValueError(f"Unknown JSON engine {name!r}, expected one of {list(ENGINES)}")
+    if name == "orjson" and orjson is None:
+        raise ValueError("The orjson JSON engine needs the orjson package")
+    _engine = "orjson" if name != "plotly" and orjson is not None else "plotly"
+    # Dash encodes callback responses and the layout through this name,
+    # imported from plotly.io.json on every call
+    plotly.io.json.to_json_plotly = to_json_plotly if _engine == "orjson" else _stock_to_json_plotly
+    return _engine
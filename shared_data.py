@@ -0,0 +1,138 @@
+import json
+import os
+
+import pandas as pd
+
+import datasets
+from figure_store import code_fingerprint, data_fingerprint
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+# Shared dataset snapshot. The cleaned frames of the dataset registry are
+# written once into uncompressed Arrow IPC files, one per frame, and every
+# process maps those files read-only: numeric, string and categorical
+# columns are read zero-copy out of the page cache, so gunicorn workers
+# (and their replacements, or processes started without preload_app) share
+# one copy of the data instead of each building and holding their own.
+# Entries that aren't frames (the raw workbook sheets, the province
+# geometry, ProvinceMatrix values) and frames Arrow can't hold exactly are
+# left out and load from their sources as before. Like the figure store,
+# the snapshot is only trusted while its manifest matches both data/ and
+# the code that cleans it.
+
+MANIFEST = "manifest.json"
+# What the cleaned frames depend on besides data/
+SNAPSHOT_CODE = ("datasets.py", "ingest.py", "shared_data.py")
+SNAPSHOT_PACKAGES = ("pandas", "pyarrow", "numpy")
+
+
+def _table(df):
+    table = pa.Table.from_pandas(df, preserve_index=True)
+    # Arrow turns NaN into nulls, which to_pandas has to copy back into
+    # NaN; store float columns with NaN values instead so they map as is
+    for i in range(df.shape[1]):
+        column = df.iloc[:, i]
+        if column.dtype.kind == "f" and table.column(i).null_count:
+            table = table.set_column(i, table.field(i), pa.array(column.to_numpy(), type=table.field(i).type))
+    return table
+
+
+def _read_frame(path):
+    source = pa.memory_map(path)
+    return pa.ipc.open_file(source).read_all().to_pandas(split_blocks=True)
+
+
+class DataSnapshot:
+    def __init__(self, directory):
+        self.directory = directory
+        self._entries = None
+
+    def is_current(self, fingerprint, code):
+        try:
+            with open(os.path.join(self.directory, MANIFEST), "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if manifest.get("fingerprint") != fingerprint or manifest.get("code") != code:
+            return False
+        self._entries = manifest["entries"]
+        return True
+
+    def _write_frame(self, df, name):
+        # File name of the frame, or None when Arrow can't round-trip it
+        path = os.path.join(self.directory, name + ".arrow")
+        # Per process, so processes attaching at once don't share temp files
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            table = _table(df)
+            with pa.OSFile(tmp, "wb") as f:
+                with pa.ipc.new_file(f, table.schema) as writer:
+                    writer.write_table(table)
+            pd.testing.assert_frame_equal(_read_frame(tmp), df, check_exact=True)
+        except (pa.ArrowException, AssertionError):
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return None
+        os.replace(tmp, path)
+        return name + ".arrow"
+
+    def _write_value(self, value, name):
+        # Manifest spec of a registry value, or None if it can't be stored
+        if isinstance(value, pd.DataFrame):
+            path = self._write_frame(value, name)
+            return {"frame": path} if path else None
+        if isinstance(value, datasets.CountryIndex):
+            path = self._write_frame(value.frame(), name)
+            return {"country_index": path, "column": value.column} if path else None
+        if isinstance(value, tuple):
+            items = [self._write_value(item, f"{name}.{i}") for i, item in enumerate(value)]
+            return {"tuple": items} if all(items) else None
+        return None
+
+    def write(self, fingerprint, code):
+        # Snapshot every entry, freshly loaded from data/; returns the
+        # names of the entries it holds
+        os.makedirs(self.directory, exist_ok=True)
+        entries = {}
+        for name, value in datasets.build(datasets.names()).items():
+            spec = self._write_value(value, name)
+            if spec is not None:
+                entries[name] = spec
+        tmp = os.path.join(self.directory, f"{MANIFEST}.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"fingerprint": fingerprint, "code": code, "entries": entries}, f)
+        os.replace(tmp, os.path.join(self.directory, MANIFEST))
+        self._entries = entries
+        return list(entries)
+
+    def _read_value(self, spec):
+        if "frame" in spec:
+            return _read_frame(os.path.join(self.directory, spec["frame"]))
+        if "country_index" in spec:
+            return datasets.CountryIndex(_read_frame(os.path.join(self.directory, spec["country_index"])), spec["column"])
+        return tuple(self._read_value(item) for item in spec["tuple"])
+
+    def load(self, name):
+        spec = (self._entries or {}).get(name)
+        if spec is None:
+            return None
+        try:
+            return self._read_value(spec)
+        except (OSError, pa.ArrowException):
+            return None
+
+
+def attach(directory):
+    # Serve the registry from the snapshot in directory, writing it first if
+    # it is missing or stale; None without pyarrow
+    if pa is None:
+        return None
+    snapshot = DataSnapshot(directory)
+    fingerprint, code = data_fingerprint(), code_fingerprint(SNAPSHOT_CODE, SNAPSHOT_PACKAGES)
+    if not snapshot.is_current(fingerprint, code):
+        snapshot.write(fingerprint, code)
+    datasets.use_snapshot(snapshot)
+    return snapshot
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The app reads data/ and its modules relative to the repository root,
+# like wsgi.py and the scripts set up
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
@@ -0,0 +1,34 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import ingest
+
+
+def test_workbook_snapshot_keeps_blank_cells(tmp_path, monkeypatch):
+    # A header=None sheet like table 6.11: header text over numbers, with a
+    # blank row and blank cells in between
+    monkeypatch.setattr(ingest, "CACHE_DIR", str(tmp_path / "cache"))
+    path = str(tmp_path / "book.xlsx")
+    rows = [
+        ["Category", "Region", "Basic Level Male", "Tertiary Level Total"],
+        ["Overall", "Nepal", 96.2, 16.7],
+        [None, None, None, None],
+        ["Province", "Koshi", 95.9, None],
+        ["Province", None, 19, 16],
+    ]
+    with pd.ExcelWriter(path) as writer:
+        pd.DataFrame(rows).to_excel(writer, sheet_name="NER Data", header=False, index=False)
+    raw = pd.read_excel(path, sheet_name="NER Data", header=None)
+
+    parsed = ingest.load_workbook(path, ["NER Data"])["NER Data"]
+    assert any(name.endswith(".parquet") for name in os.listdir(ingest.CACHE_DIR))
+    snapshot = ingest.load_workbook(path, ["NER Data"])["NER Data"]
+
+    for sheet in (parsed, snapshot):
+        assert sheet.shape == raw.shape
+        assert list(sheet.columns) == list(raw.columns)
+        np.testing.assert_array_equal(sheet.isna().to_numpy(), raw.isna().to_numpy())
+        present = raw.notna().to_numpy()
+        assert list(sheet.to_numpy()[present]) == [str(v) for v in raw.to_numpy()[present]]
@@ -0,0 +1,19 @@
+import pytest
+
+import literacy
+from config import load_config
+
+
+@pytest.fixture(scope="module", autouse=True)
+def app():
+    # update_map builds the geometry URL through dash.get_relative_path
+    return literacy.create_app(load_config("local", reload_data=False))
+
+
+@pytest.mark.parametrize("dataset", ["table_13", "table_14"])
+def test_missing_indicator_gets_empty_map(dataset):
+    # e.g. a column renamed by a data reload while a client still holds it
+    fig = literacy.update_map(dataset, "split", "No such column", "NPL")
+    assert fig.data[0].type == "choroplethmapbox"
+    assert len(fig.data[0].locations) == 0
+    assert fig.to_json() == literacy.update_map(dataset, "split", None, "NPL").to_json()
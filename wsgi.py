@@ -0,0 +1,40 @@
+import gc
+import os
+import sys
+
+# Production entry point. Serve with
+#   gunicorn -c gunicorn.conf.py wsgi:server
+# or, where gunicorn is unavailable (e.g. Windows),
+#   python wsgi.py
+# With gunicorn's preload_app the data and figure caches are built once in
+# the master (see the "deployed" profile in config.py) and shared
+# copy-on-write by every forked worker.
+
+os.chdir(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.getcwd())
+
+from config import load_config
+from literacy import create_app
+
+config = load_config()
+app = create_app(config)
+server = app.server
+
+# Move everything built so far out of the GC's generations, so collections
+# in the workers don't touch (and un-share) those pages
+gc.collect()
+gc.freeze()
+
+
+if __name__ == "__main__":
+    try:
+        from waitress import serve
+    except ImportError:
+        sys.exit("python wsgi.py serves through waitress: pip install waitress (or run gunicorn -c gunicorn.conf.py wsgi:server)")
+
+    serve(
+        server,
+        host=config["host"],
+        port=config["port"],
+        threads=int(os.environ.get("WAITRESS_THREADS", 8)),
+    )